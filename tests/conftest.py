@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# リポジトリ直下の text_replace_mac_app を import できるようにする
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
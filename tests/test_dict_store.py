@@ -0,0 +1,89 @@
+import pytest
+
+import text_replace_mac_app as app
+from text_replace_mac_app import DictStore, Rule
+
+
+@pytest.fixture(autouse=True)
+def _no_old_rules_file(tmp_path, monkeypatch):
+    # ホームにある旧形式ファイルを移行元として拾わない
+    monkeypatch.setattr(app, "OLD_RULES_FILE", tmp_path / "missing_old_rules.json")
+
+
+def test_failed_flush_keeps_change_pending(tmp_path):
+    path = tmp_path / "sub" / "dicts.json"
+    store = DictStore(path)
+    store.dicts = {"default": [Rule(True, "a", "b")]}
+
+    # 保存先のフォルダが無いので書き込みに失敗する
+    with pytest.raises(OSError):
+        store.mark_dirty()
+    assert not path.exists()
+
+    # 変更は保留のまま残り、次の flush で書き込まれる
+    path.parent.mkdir()
+    store.flush()
+    assert path.exists()
+
+    reloaded = DictStore(path)
+    reloaded.load()
+    assert reloaded.get_rules("default") == [Rule(True, "a", "b")]
+
+
+def _saved_store(path):
+    store = DictStore(path)
+    store.load()
+    store.get_rules("default").extend([Rule(True, "a", "b"), Rule(False, "c", "")])
+    assert store.create("foo")
+    store.get_rules("foo").append(Rule(True, "x", "y"))
+    store.save()
+    return store
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "dicts.json"
+    _saved_store(path)
+
+    store = DictStore(path)
+    store.load()
+    assert store.names() == ["default", "foo"]
+    assert store.get_rules("default") == [Rule(True, "a", "b"), Rule(False, "c", "")]
+    assert store.get_rules("foo") == [Rule(True, "x", "y")]
+
+
+def test_unchanged_save_does_not_write(tmp_path, monkeypatch):
+    path = tmp_path / "dicts.json"
+    _saved_store(path)
+
+    writes = []
+    real_replace = app.os.replace
+    monkeypatch.setattr(app.os, "replace", lambda a, b: (writes.append(b), real_replace(a, b)))
+
+    store = DictStore(path)
+    store.load()
+    # 読み込んだだけ・変換しただけでは内容は変わらないので書き込まない
+    store.save()
+    store.get_rules("foo")
+    store.save()
+    assert writes == []
+
+    store.get_rules("foo").append(Rule(True, "p", "q"))
+    store.save()
+    assert writes == [path]
+
+
+def test_corrupt_file_falls_back_to_empty_default(tmp_path):
+    path = tmp_path / "dicts.json"
+    path.write_bytes(b'{"version": 1, "dicts": {"default": [')
+
+    store = DictStore(path)
+    store.load()
+    assert store.names() == ["default"]
+    assert store.get_rules("default") == []
+
+    # 壊れたファイルの上にも、次の保存で正しい内容を書ける
+    store.get_rules("default").append(Rule(True, "a", "b"))
+    store.save()
+    reloaded = DictStore(path)
+    reloaded.load()
+    assert reloaded.get_rules("default") == [Rule(True, "a", "b")]
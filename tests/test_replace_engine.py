@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+import text_replace_mac_app as app
+from text_replace_mac_app import Rule, RuleMatcher
+
+
+def _regex_matcher(rules, monkeypatch):
+    # pyahocorasick が無い環境と同じ、正規表現の選択による照合
+    with monkeypatch.context() as mp:
+        mp.setattr(app, "ahocorasick", None)
+        return RuleMatcher(rules)
+
+
+def _random_case(rnd: random.Random):
+    rules = [
+        Rule(True, "".join(rnd.choice("abc") for _ in range(rnd.randint(1, 4))), rnd.choice(["X", "YY", ""]))
+        for _ in range(rnd.randint(1, 6))
+    ]
+    text = "".join(rnd.choice("abc#\n") for _ in range(rnd.randint(0, 16)))
+    return rules, text
+
+
+@pytest.mark.parametrize(
+    "srcs, text",
+    [
+        (["abb", "cabc", "b"], "cab#"),
+        (["b", "cbcc"], "cb"),
+        (["b", "caa", "cbcc", "caca"], "cb\nca\ncb"),
+    ],
+)
+def test_automaton_does_not_drop_matches(srcs, text, monkeypatch):
+    pytest.importorskip("ahocorasick")
+    rules = [Rule(True, s, "<" + s + ">") for s in srcs]
+    assert RuleMatcher(rules).replace(text) == _regex_matcher(rules, monkeypatch).replace(text)
+
+
+def test_backends_agree_on_random_rules(monkeypatch):
+    if app.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    rnd = random.Random(20240611)
+    for _ in range(5000):
+        rules, text = _random_case(rnd)
+        ac = RuleMatcher(rules)
+        rx = _regex_matcher(rules, monkeypatch)
+        assert ac.replace(text) == rx.replace(text), (rules, text)
+        assert list(ac.iter_spans(text)) == list(rx.iter_spans(text)), (rules, text)
+
+
+@pytest.mark.parametrize("use_automaton", [True, False])
+def test_highlight_spans_are_what_replace_rewrites(use_automaton, monkeypatch):
+    # 入力の色付け（iter_spans）は、置換で書き換わる箇所とちょうど一致していなければならない
+    if use_automaton and app.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    rnd = random.Random(7)
+    for _ in range(2000):
+        rules, text = _random_case(rnd)
+        matcher = RuleMatcher(rules) if use_automaton else _regex_matcher(rules, monkeypatch)
+        pieces = []
+        cursor = 0
+        for start, end in matcher.iter_spans(text):
+            pieces.append(text[cursor:start])
+            pieces.append(matcher.mapping[text[start:end]])
+            cursor = end
+        pieces.append(text[cursor:])
+        assert "".join(pieces) == matcher.replace(text)[0], (rules, text)
+
+
+def _serial_replace(text, rules):
+    # 以前の置換（上のルールから順に str.replace）
+    for r in rules:
+        if r.enabled and r.src:
+            text = text.replace(r.src, r.dst)
+    return text
+
+
+@pytest.mark.parametrize("use_automaton", [True, False])
+def test_single_pass_matches_serial_replace_without_cascading(use_automaton, monkeypatch):
+    # src は「<語>」の形にし、dst は < > も a b も含まない空でない文字列にする。一致どうしが重ならず、
+    # 置換結果（や前後がつながった文字列）が次のルールに拾われることもないので、
+    # 1回の走査でも従来の順次置換と同じ結果になるはず
+    if use_automaton and app.ahocorasick is None:
+        pytest.skip("pyahocorasick is not installed")
+    rnd = random.Random(12)
+    for _ in range(2000):
+        words = ["".join(rnd.choice("ab") for _ in range(rnd.randint(0, 3))) for _ in range(rnd.randint(1, 6))]
+        rules = [Rule(rnd.random() < 0.8, f"<{w}>", rnd.choice(["x", "yy", "Z"])) for w in words]
+        tokens = [f"<{rnd.choice(words)}>" for _ in range(rnd.randint(0, 5))] + list("ab<>\n")
+        text = "".join(rnd.choice(tokens) for _ in range(rnd.randint(0, 10)))
+
+        enabled = [r for r in rules if r.enabled]
+        matcher = RuleMatcher(enabled) if use_automaton else _regex_matcher(enabled, monkeypatch)
+        assert matcher.replace(text)[0] == _serial_replace(text, rules), (rules, text)
+        assert app.cascade_replace(text, enabled) == _serial_replace(text, rules)
+
+
+def test_cascade_diff_keeps_individual_changes():
+    # 差分が時間切れや意味的なまとめで、出力全体を1つの変更にしてしまわないこと
+    rnd = random.Random(3)
+    alphabet = [chr(0x4E00 + i) for i in range(3000)]
+    text = "".join(rnd.choice(alphabet) for _ in range(20000))
+    rules = [Rule(True, a, b) for a, b in zip(alphabet[:30], alphabet[30:60])]
+    out = app.cascade_replace(text, rules)
+
+    # 1文字ずつの置換なので、色付けはちょうど変わった文字だけを覆うはず
+    spans = app.cascade_spans(text, out, rules)
+    changed = {k for k, (a, b) in enumerate(zip(text, out)) if a != b}
+    covered = {k for j1, j2, _before in spans for k in range(j1, j2)}
+    assert covered == changed
+
+
+def test_cascade_diff_timeout_falls_back_to_rule_scan(monkeypatch):
+    # 打ち切られた粗い差分（出力全体が1つの変更）を使わず、dst の出現位置で色付けすること
+    if app.diff_match_patch is None:
+        pytest.skip("diff-match-patch is not installed")
+    monkeypatch.setattr(app, "DIFF_TIMEOUT", 0.001)
+    monkeypatch.setattr(app, "_dmp", None)
+    rnd = random.Random(5)
+    alphabet = [chr(0x4E00 + i) for i in range(60)]
+    text = "".join(rnd.choice(alphabet[:30]) for _ in range(3000))
+    rules = [Rule(True, a, b + "x") for a, b in zip(alphabet[:30], alphabet[30:60])]
+    out = app.cascade_replace(text, rules)
+
+    assert app.diff_spans(text, out) is None
+    spans = app.cascade_spans(text, out, rules)
+    assert len(spans) == len(text)
+    assert all(out[j1:j2] == rules[alphabet.index(before)].dst for j1, j2, before in spans)
@@ -0,0 +1,14 @@
+from text_replace_mac_app import line_starts_of, offsets_to_indices
+
+TEXT = "ab\ncab\n\nxxab"
+
+
+def test_offsets_to_indices():
+    starts = line_starts_of(TEXT)
+    offsets = [0, 2, 3, 6, 7, 8, len(TEXT)]
+    assert offsets_to_indices(starts, offsets) == ["1.0", "1.2", "2.0", "2.3", "3.0", "4.0", "4.4"]
+
+
+def test_offsets_to_indices_first_line():
+    starts = line_starts_of(TEXT)
+    assert offsets_to_indices(starts, [0, 4], first_line=10) == ["10.0", "11.1"]
@@ -0,0 +1,14 @@
+import pytest
+
+from text_replace_mac_app import wheel_units
+
+
+@pytest.mark.parametrize("delta", [1, 60, 120, 180, 240, 359, 360, 1000])
+def test_wheel_units_symmetric(delta):
+    # 上下どちらに回しても同じ量だけ動く（負の側だけ多く動かない）
+    assert wheel_units(-delta) == -wheel_units(delta)
+
+
+@pytest.mark.parametrize("delta, units", [(1, -1), (120, -1), (180, -1), (240, -2), (-120, 1), (-180, 1), (-240, 2)])
+def test_wheel_units_values(delta, units):
+    assert wheel_units(delta) == units
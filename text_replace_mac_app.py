@@ -1,51 +1,536 @@
+import os
 import sys
 import json
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, simpledialog
-from dataclasses import dataclass, asdict
+from tkinter import ttk, messagebox, filedialog
+from dataclasses import dataclass
 from pathlib import Path
-import difflib
-from typing import List, Dict, Optional, Callable
+import re
+import functools
+import hashlib
+import time
+import weakref
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Callable, Tuple, Sequence
 import tkinter.font as tkfont
 
+try:
+    import ahocorasick  # pyahocorasick（任意）
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson  # 任意（あれば辞書の保存が速い）
+except ImportError:
+    orjson = None
+
+try:
+    from diff_match_patch import diff_match_patch  # 任意（あれば連鎖置換の差分が速い）
+except ImportError:
+    diff_match_patch = None
+
+try:
+    import charset_normalizer  # 任意（UTF-8 / cp932 以外のファイルの文字コード推定）
+except ImportError:
+    charset_normalizer = None
+
 APP_NAME = "Text Replace"
 
 OLD_RULES_FILE = Path.home() / ".text_replace_rules.json"
 DICT_STORE_FILE = Path.home() / ".text_replace_dictionaries.json"
 SETTINGS_FILE = Path.home() / ".text_replace_settings.json"
 
+# 連鎖置換で差分による色付けを行う入力の上限（文字数）。超えたら置換後の文字列を探して色付けする。
+# 改行の少ない 3000 字種の文書で、差分（diff-match-patch・difflib とも）が 5 万字で約 0.5 秒、
+# 6 万字で約 0.7 秒、20 万字では 7 秒以上かかったので、5 万字で打ち切る
+DIFF_HIGHLIGHT_LIMIT = 50_000
+# 上限以下でも変更が多いと差分は長引く（2000 字がすべて変わると 2 秒超）。
+# diff-match-patch がこの秒数で打ち切ったら、その粗い結果は使わずに上と同じ探し方で色付けする
+DIFF_TIMEOUT = 2.0
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class Rule:
     enabled: bool
     src: str
     dst: str
 
 
+# -----------------------------
+# Replace engine (single pass)
+# -----------------------------
+@functools.lru_cache(maxsize=4096)
+def _escape(s: str) -> str:
+    """src ごとの re.escape 結果を覚えておく（ルールが1つ変わっただけなら他は再計算しない）"""
+    return re.escape(s)
+
+
+class RuleMatcher:
+    """
+    有効ルールをまとめてコンパイルし、入力を左から1回だけ走査して置換する。
+    各位置で最長一致した src を dst に置き換え、置換後の文字列は再走査しない（連鎖置換なし）。
+    同じ src が複数ある場合は上のルールを優先（従来の上から順の置換と同じ結果）。
+    pyahocorasick があれば Aho-Corasick、無ければ長い順に並べた正規表現の選択で照合する。
+    """
+    def __init__(self, rules: List[Rule]):
+        self.mapping: Dict[str, str] = {}
+        for r in rules:
+            if r.src and r.src not in self.mapping:
+                self.mapping[r.src] = r.dst
+
+        # 各 src の先頭文字。入力にどれも含まれなければ一致は起こり得ない
+        self.first_chars = frozenset(src[0] for src in self.mapping)
+        # 改行を含む src があるか（あれば行単位の部分的な照合では取りこぼし得る）
+        self.multiline = any("\n" in src for src in self.mapping)
+
+        self.automaton = None
+        self.pattern: Optional[re.Pattern] = None
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for src, dst in self.mapping.items():
+                self.automaton.add_word(src, (src, dst))
+            self.automaton.make_automaton()
+        else:
+            srcs = sorted(self.mapping, key=len, reverse=True)
+            self.pattern = re.compile("|".join(_escape(s) for s in srcs))
+
+    def _iter_matches(self, text: str):
+        """重ならない一致を左から順に (start, end, src, dst) で返す"""
+        if self.automaton is None:
+            mapping = self.mapping
+            for m in self.pattern.finditer(text):
+                src = m.group(0)
+                yield m.start(), m.end(), src, mapping[src]
+            return
+        # iter_long は一致の途中で別の候補に移ると、その先の短い一致を取りこぼすことがある。
+        # すべての一致を受け取り、開始位置ごとに最長のものを残してから左から重ならないように選ぶ
+        # （正規表現の「長い順の選択」と同じく、最も左・その位置で最長の一致）
+        longest: Dict[int, Tuple[int, str, str]] = {}
+        for end, (src, dst) in self.automaton.iter(text):
+            start = end - len(src) + 1
+            cur = longest.get(start)
+            if cur is None or cur[0] <= end:
+                longest[start] = (end + 1, src, dst)
+        cursor = 0
+        for start in sorted(longest):
+            if start < cursor:
+                continue
+            end, src, dst = longest[start]
+            yield start, end, src, dst
+            cursor = end
+
+    def iter_spans(self, text: str):
+        """入力側の一致範囲 (start, end) を左から順に返す（置換で書き換わる箇所と同じ）"""
+        if self.first_chars.isdisjoint(text):
+            return
+        for start, end, _src, _dst in self._iter_matches(text):
+            yield start, end
+
+    def replace(self, text: str) -> Tuple[str, List[Tuple[int, int, str]]]:
+        """
+        置換後の文字列と、出力側の置換箇所 (start, end, 置換前の文字列) の一覧を返す。
+        置換箇所は走査中にそのまま記録するので、差分を取り直す必要はない。
+        """
+        if self.first_chars.isdisjoint(text):
+            return text, []
+
+        chunks: List[str] = []
+        spans: List[Tuple[int, int, str]] = []
+        cursor = 0
+        out_len = 0
+        for start, end, src, dst in self._iter_matches(text):
+            chunks.append(text[cursor:start])
+            out_len += start - cursor
+            chunks.append(dst)
+            if dst:
+                spans.append((out_len, out_len + len(dst), src))
+            out_len += len(dst)
+            cursor = end
+        chunks.append(text[cursor:])
+        return "".join(chunks), spans
+
+
+def cascade_replace(text: str, rules: List[Rule]) -> str:
+    """従来どおり上のルールから順に全体へ適用する（前のルールの置換結果も次のルールの対象になる）"""
+    out = text
+    for r in rules:
+        out = out.replace(r.src, r.dst)
+    return out
+
+
+_dmp = None
+
+
+def diff_spans(original: str, modified: str) -> Optional[List[Tuple[int, int, str]]]:
+    """
+    連鎖置換では置換箇所を走査中に追えないので、差分から出力側の変更範囲を求める。
+    diff-match-patch（Myers 差分）があればそれを使い、無ければ difflib。
+    diff-match-patch が DIFF_TIMEOUT 秒で打ち切った場合は None。
+    """
+    global _dmp
+    if diff_match_patch is not None:
+        if _dmp is None:
+            _dmp = diff_match_patch()
+            # 打ち切られた差分は出力全体が1つの変更のような粗いものになるので、
+            # 時間で打ち切られたかどうかを見て使わないようにする（下の経過時間の判定）。
+            # diff_cleanupSemantic も近い変更どうしをまとめてしまうので使わない
+            _dmp.Diff_Timeout = DIFF_TIMEOUT
+        t0 = time.monotonic()
+        diffs = _dmp.diff_main(original, modified)
+        if time.monotonic() - t0 >= DIFF_TIMEOUT:
+            return None
+        return _spans_from_dmp(diffs)
+
+    import difflib  # 連鎖置換の色付けでしか使わないので、必要になったときに読み込む
+
+    spans: List[Tuple[int, int, str]] = []
+    sm = difflib.SequenceMatcher(a=original, b=modified)
+    for op, i1, i2, j1, j2 in sm.get_opcodes():
+        if op in ("replace", "insert") and j1 != j2:
+            spans.append((j1, j2, original[i1:i2]))
+    return spans
+
+
+def cascade_spans(original: str, modified: str, rules: List[Rule]) -> List[Tuple[int, int, str]]:
+    """
+    連鎖置換の結果の色付け範囲。
+    変化なしなら空、大きな入力や差分が時間内に求まらないときは、出力中の各ルールの dst の出現位置を使う
+    （元から同じ文字列があった箇所も色が付くが、差分のような長時間の計算はしない）。
+    """
+    if original == modified:
+        return []
+    if len(original) <= DIFF_HIGHLIGHT_LIMIT:
+        spans = diff_spans(original, modified)
+        if spans is not None:
+            return spans
+
+    found: List[Tuple[int, int, str]] = []
+    for r in rules:
+        if not r.dst:
+            continue
+        n = len(r.dst)
+        k = modified.find(r.dst)
+        while k != -1:
+            found.append((k, k + n, r.src))
+            k = modified.find(r.dst, k + n)
+
+    # 開始位置順に並べ、同じ位置なら長い方を残して重なりを除く
+    found.sort(key=lambda sp: (sp[0], -sp[1]))
+    spans: List[Tuple[int, int, str]] = []
+    end = -1
+    for sp in found:
+        if sp[0] >= end:
+            spans.append(sp)
+            end = sp[1]
+    return spans
+
+
+def _spans_from_dmp(diffs) -> List[Tuple[int, int, str]]:
+    # (op, text) の列を、difflib の replace / insert と同じ (j1, j2, 置換前) にまとめる
+    spans: List[Tuple[int, int, str]] = []
+    j = 0
+    deleted: List[str] = []
+    for op, data in diffs:
+        if op == diff_match_patch.DIFF_EQUAL:
+            deleted = []
+            j += len(data)
+        elif op == diff_match_patch.DIFF_DELETE:
+            deleted.append(data)
+        else:
+            spans.append((j, j + len(data), "".join(deleted)))
+            deleted = []
+            j += len(data)
+    return spans
+
+
+def line_starts_of(text: str) -> array:
+    """各行の先頭の文字オフセット（0始まり）の表。int の配列で持ち、行数が多くても小さく済ませる"""
+    starts = array("i", [0])
+    append = starts.append
+    find = text.find
+    i = find("\n")
+    while i != -1:
+        append(i + 1)
+        i = find("\n", i + 1)
+    return starts
+
+
+def offsets_to_indices(line_starts: Sequence[int], offsets: Sequence[int], first_line: int = 1) -> List[str]:
+    """
+    文字オフセットの列をまとめて Tk の "行.列" にする（"1.0+Nc" のように Tk 側で先頭から数え直させない）。
+    結果の入れ物は先に確保し、1件ずつ関数を呼ばずに1つのループで埋める
+    """
+    out: List[str] = [""] * len(offsets)
+    bisect = bisect_right
+    shift = first_line - 1
+    for k, off in enumerate(offsets):
+        line = bisect(line_starts, off)
+        out[k] = f"{line + shift}.{off - line_starts[line - 1]}"
+    return out
+
+
 # -----------------------------
 # Tooltip
 # -----------------------------
 class Tooltip:
+    """
+    ツールチップ用の Toplevel は最初に1つだけ作って隠しておき、以降は文言と位置を書き換えて
+    withdraw / deiconify で出し入れする（表示のたびに生成・破棄をしない）。
+    """
     def __init__(self, master: tk.Tk):
         self.master = master
-        self.tip = None
+        self.tip = tk.Toplevel(master)
+        self.tip.withdraw()
+        self.tip.wm_overrideredirect(True)
+        try:
+            self.tip.attributes("-topmost", True)
+        except Exception:
+            pass
+        self.label = ttk.Label(self.tip, text="", relief="solid", borderwidth=1, padding=(8, 6))
+        self.label.pack()
+        self._visible = False
+        self._text = ""
 
     def show(self, x, y, text):
-        self.hide()
-        self.tip = tk.Toplevel(self.master)
-        self.tip.wm_overrideredirect(True)
-        self.tip.attributes("-topmost", True)
+        if text != self._text:
+            self.label.configure(text=text)
+            self._text = text
         self.tip.geometry(f"+{x+12}+{y+12}")
-        label = ttk.Label(self.tip, text=text, relief="solid", borderwidth=1, padding=(8, 6))
-        label.pack()
+        if not self._visible:
+            self.tip.deiconify()
+            self._visible = True
 
     def hide(self):
-        if self.tip:
+        if self._visible:
             try:
-                self.tip.destroy()
+                self.tip.withdraw()
             except Exception:
                 pass
-        self.tip = None
+        self._visible = False
+
+    def close(self):
+        self._visible = False
+        try:
+            self.tip.destroy()
+        except Exception:
+            pass
+
+
+# -----------------------------
+# Prompt dialog (reusable / non-blocking)
+# -----------------------------
+class PromptDialog(tk.Toplevel):
+    """
+    確認・名前入力用の小さなダイアログ。作るのは最初の1回だけで、以降は withdraw / deiconify で使い回す。
+    messagebox の確認や文字入力と違って入れ子のイベントループを回さず、結果は on_result で受け取る。
+    （確認: True / False、入力: 文字列 / キャンセルなら None）
+    """
+    def __init__(self, master):
+        super().__init__(master)
+        self.withdraw()
+        self.resizable(False, False)
+        try:
+            self.transient(master)
+        except Exception:
+            pass
+
+        self._on_result: Optional[Callable] = None
+        self._with_entry = False
+
+        body = ttk.Frame(self, padding=12)
+        body.pack(fill="both", expand=True)
+
+        self._label = ttk.Label(body, text="", justify="left")
+        self._label.pack(anchor="w")
+
+        self._var = tk.StringVar(master=self, value="")
+        self._entry = ttk.Entry(body, textvariable=self._var, width=32)
+
+        btns = ttk.Frame(body)
+        btns.pack(anchor="e", pady=(12, 0))
+        self._ok = ttk.Button(btns, text="OK", command=self._accept)
+        self._ok.pack(side="left", padx=(0, 8))
+        self._cancel_btn = ttk.Button(btns, text="キャンセル", command=self._cancel)
+        self._cancel_btn.pack(side="left")
+
+        self.bind("<Return>", lambda _e: self._accept())
+        self.bind("<Escape>", lambda _e: self._cancel())
+        self.protocol("WM_DELETE_WINDOW", self._cancel)
+
+    def ask(self, title: str, message: str, on_result: Callable, entry: bool = False, initial: str = ""):
+        # 開いたまま次の問い合わせが来たら、前のものはキャンセル扱いにする
+        if self._on_result is not None:
+            self._cancel()
+
+        self.title(title)
+        self._label.configure(text=message)
+        self._with_entry = entry
+        if entry:
+            self._ok.configure(text="OK")
+            self._cancel_btn.configure(text="キャンセル")
+            self._var.set(initial)
+            self._entry.pack(fill="x", pady=(8, 0), after=self._label)
+        else:
+            self._ok.configure(text="はい")
+            self._cancel_btn.configure(text="いいえ")
+            self._entry.pack_forget()
+        self._on_result = on_result
+
+        try:
+            m = self.master
+            self.geometry(f"+{m.winfo_rootx() + 80}+{m.winfo_rooty() + 80}")
+        except Exception:
+            pass
+        self.deiconify()
+        self.lift()
+        try:
+            self.grab_set()
+        except tk.TclError:
+            pass
+        if entry:
+            self._entry.focus_set()
+            self._entry.select_range(0, "end")
+        else:
+            self._ok.focus_set()
+
+    def _accept(self):
+        self._finish(self._var.get() if self._with_entry else True)
+
+    def _cancel(self):
+        self._finish(None if self._with_entry else False)
+
+    def _finish(self, result):
+        cb = self._on_result
+        self._on_result = None
+        try:
+            self.grab_release()
+        except tk.TclError:
+            pass
+        self.withdraw()
+        if cb is not None:
+            cb(result)
+
+
+# -----------------------------
+# Mouse wheel (shared dispatcher)
+# -----------------------------
+# スクロール可能な領域ごとに bind_all やクロージャを用意せず、1つの bindtag と1組のハンドラで受ける。
+# 領域のウィジェット名 → スクロールさせる Canvas を登録しておき、イベントの来たウィジェット名から
+# 親方向に辿って最初に見つかった領域の Canvas を動かす（destroy されたものは弱参照で自然に消える）。
+WHEEL_TAG = "AppWheel"
+_wheel_areas: "weakref.WeakValueDictionary[str, tk.Canvas]" = weakref.WeakValueDictionary()
+
+
+def register_wheel_area(area: tk.Misc, canvas: tk.Canvas):
+    """area 配下でのホイールで canvas をスクロールさせる（タグ付けは add_wheel_tag で行う）"""
+    _wheel_areas[str(area)] = canvas
+    root = area._root()
+    if getattr(root, "_app_wheel_installed", False):
+        return
+    root._app_wheel_installed = True
+    root.bind_class(WHEEL_TAG, "<MouseWheel>", _on_app_wheel)
+    root.bind_class(WHEEL_TAG, "<Shift-MouseWheel>", _on_app_wheel)  # 念のため
+    root.bind_class(WHEEL_TAG, "<Button-4>", _on_app_wheel)
+    root.bind_class(WHEEL_TAG, "<Button-5>", _on_app_wheel)
+    try:
+        root.bind_class(WHEEL_TAG, "<TouchpadScroll>", _on_app_touchpad)
+    except tk.TclError:
+        pass  # <TouchpadScroll> は Tk 8.7 以降
+
+
+def add_wheel_tag(widget: tk.Misc):
+    """
+    ★macトラックパッド対策：
+    ttk/tk標準のMouseWheel処理に“勝つ”ため、widget とその子孫の bindtags 先頭に WHEEL_TAG を入れる。
+    """
+    try:
+        tags = widget.bindtags()
+        if WHEEL_TAG not in tags:
+            widget.bindtags((WHEEL_TAG,) + tuple(tags))
+    except tk.TclError:
+        return
+    for c in widget.winfo_children():
+        add_wheel_tag(c)
+
+
+def _wheel_canvas(widget) -> Optional[tk.Canvas]:
+    # event.widget は文字列で来ることもあるので、名前（".a.b.c"）で辿る
+    path = str(widget)
+    while path:
+        canvas = _wheel_areas.get(path)
+        if canvas is not None:
+            return canvas
+        path = path.rpartition(".")[0]
+    return None
+
+
+def wheel_units(delta: int) -> int:
+    """
+    <MouseWheel> の delta をスクロール量（行）にする。120 で1刻み、端数は切り捨てて最低1行。
+    上下で同じ量になるよう絶対値で割ってから符号を付ける（-delta // 120 だと負の側だけ切り上がる）
+    """
+    n = abs(delta) // 120 or 1
+    return -n if delta > 0 else n
+
+
+def _scroll(canvas: tk.Canvas, units: int):
+    try:
+        canvas.yview_scroll(units, "units")
+    except tk.TclError:
+        pass
+
+
+def _on_app_wheel(event):
+    canvas = _wheel_canvas(event.widget)
+    if canvas is None:
+        return "break"
+    if event.num == 4:
+        units = -1
+    elif event.num == 5:
+        units = 1
+    else:
+        delta = getattr(event, "delta", 0)
+        if delta == 0:
+            return "break"
+        units = wheel_units(delta)
+    _scroll(canvas, units)
+    return "break"
+
+
+def _on_app_touchpad(event):
+    """
+    ★Tk 8.7+ などでトラックパッド2本指が <TouchpadScroll> になる環境用
+    event.delta (%D) は「dx,dy を詰めた値」になるので、tk::PreciseScrollDeltas があればそれで解凍。
+    """
+    canvas = _wheel_canvas(event.widget)
+    d = getattr(event, "delta", 0)
+    if canvas is None or d == 0:
+        return "break"
+
+    dy = 0
+
+    # Tk 8.7 の TIP 684: tk::PreciseScrollDeltas がある場合に dx,dy を取る
+    try:
+        # 戻り値は文字列のリストになる（例: "0 -3"）
+        parts = canvas.tk.call("tk::PreciseScrollDeltas", d)
+        # tk.call の戻りは tuple になる場合もあるので両対応
+        if isinstance(parts, (tuple, list)) and len(parts) >= 2:
+            dy = int(parts[1])
+        else:
+            sp = str(parts).split()
+            if len(sp) >= 2:
+                dy = int(float(sp[1]))
+    except Exception:
+        # PreciseScrollDeltas が無い環境では dy 相当として雑に扱う
+        dy = int(d)
+
+    # Canvas の yview_scroll は「+で下へ」なので dy の符号を反転
+    # 高頻度イベント対策：dyが小さいときは1行に丸める
+    if dy != 0:
+        _scroll(canvas, -1 if dy > 0 else 1)
+    return "break"
 
 
 # -----------------------------
@@ -54,15 +539,23 @@ class Tooltip:
 class ScrollableFrame(ttk.Frame):
     """
     Rules list frame with ttk.Scrollbar (same look as your dictionary dialog).
-    Wheel binding in RuleManager is handled by binding recursively to all widgets,
-    so here we disable internal bind by default for the rules dialog.
+    Wheel scrolling goes through the shared AppWheel dispatcher. The rules dialog registers
+    the whole dialog as its wheel area itself, so it passes enable_wheel_bind=False here.
     """
-    def __init__(self, master, enable_wheel_bind: bool = True, **kwargs):
+    def __init__(
+        self,
+        master,
+        enable_wheel_bind: bool = True,
+        on_viewport_change: Optional[Callable[[], None]] = None,
+        **kwargs,
+    ):
         super().__init__(master, **kwargs)
 
+        self.on_viewport_change = on_viewport_change
+
         self.canvas = tk.Canvas(self, highlightthickness=0)
         self.vscroll = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
-        self.canvas.configure(yscrollcommand=self.vscroll.set)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
 
         self.inner = ttk.Frame(self.canvas)
         self.inner_id = self.canvas.create_window((0, 0), window=self.inner, anchor="nw")
@@ -76,89 +569,139 @@ class ScrollableFrame(ttk.Frame):
         self.inner.bind("<Configure>", self._on_inner_configure)
         self.canvas.bind("<Configure>", self._on_canvas_configure)
 
+        # ホイールは bind_all で全体を奪わず、共通の WHEEL_TAG で受ける
         self._enable_wheel_bind = enable_wheel_bind
-        self._wheel_bound = False
 
         if self._enable_wheel_bind:
-            for w in (self.canvas, self.inner):
-                w.bind("<Enter>", self._bind_wheel, add="+")
-                w.bind("<Leave>", self._unbind_wheel, add="+")
+            register_wheel_area(self, self.canvas)
+            add_wheel_tag(self)
 
     def _on_inner_configure(self, _event):
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
     def _on_canvas_configure(self, event):
         self.canvas.itemconfigure(self.inner_id, width=event.width)
+        if self.on_viewport_change:
+            self.on_viewport_change()
 
-    def _bind_wheel(self, _event=None):
-        if not self._enable_wheel_bind:
-            return
-        if self._wheel_bound:
-            return
-        self._wheel_bound = True
-        self.bind_all("<MouseWheel>", self._on_mousewheel, add="+")
-        self.bind_all("<Button-4>", self._on_mousewheel_linux, add="+")
-        self.bind_all("<Button-5>", self._on_mousewheel_linux, add="+")
-
-    def _unbind_wheel(self, _event=None):
-        if not self._enable_wheel_bind:
-            return
-        if not self._wheel_bound:
-            return
-        self._wheel_bound = False
-        try:
-            self.unbind_all("<MouseWheel>")
-            self.unbind_all("<Button-4>")
-            self.unbind_all("<Button-5>")
-        except Exception:
-            pass
+    def _on_yscroll(self, first, last):
+        self.vscroll.set(first, last)
+        if self.on_viewport_change:
+            self.on_viewport_change()
 
-    def _on_mousewheel(self, event):
-        try:
-            if not self.winfo_exists() or not self.canvas.winfo_exists():
-                return
-            delta = getattr(event, "delta", 0)
-            if delta == 0:
-                return
-            units = int(-1 * (delta / 120))
-            if units == 0:
-                units = -1 if delta > 0 else 1
-            self.canvas.yview_scroll(units, "units")
-        except tk.TclError:
-            return
-
-    def _on_mousewheel_linux(self, event):
-        try:
-            if not self.winfo_exists() or not self.canvas.winfo_exists():
-                return
-            if event.num == 4:
-                self.canvas.yview_scroll(-1, "units")
-            elif event.num == 5:
-                self.canvas.yview_scroll(1, "units")
-        except tk.TclError:
-            return
-
-    def destroy(self):
-        try:
-            self._unbind_wheel()
-        except Exception:
-            pass
-        super().destroy()
+    def add_wheel_target(self, widget: tk.Misc):
+        """inner に置いた子ウィジェットの上でもホイールでスクロールできるよう bindtag を足す"""
+        if self._enable_wheel_bind:
+            add_wheel_tag(widget)
 
 
 # -----------------------------
 # Dictionary Store (multiple dicts)
 # -----------------------------
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    # str にデコードしてから渡さず、バイト列のまま json に渡す（UTF-8 の解釈は C 側で1回だけ）
+    return json.loads(data)
+
+
+def _read_json(path: Path):
+    return _loads(path.read_bytes())
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _rules_from_json(rules_list) -> List[Rule]:
+    """保存形式の dict の並びを Rule に戻す（ルール数が多いので内包表記・位置引数で組み立てる）"""
+    intern = sys.intern
+    return [
+        Rule(bool(r.get("enabled", True)), intern(str(r.get("src", ""))), intern(str(r.get("dst", ""))))
+        for r in rules_list
+    ]
+
+
 class DictStore:
     """
     DICT_STORE_FILE: {"version":1,"dicts":{"default":[{rule},...], "foo":[...]}}
     旧形式 OLD_RULES_FILE があれば初回に default として移行。
+    保存ファイルは改行・インデントなしのコンパクトな JSON（人が読む用は export で出力）。
+    読み込み時は JSON のまま持っておき、Rule への変換は get_rules で初めて使う辞書だけ行う。
     """
+    FLUSH_DELAY_MS = 500
+    # 書き込みに失敗したときの再試行までの間隔
+    RETRY_DELAY_MS = 5000
+
     def __init__(self, path: Path):
         self.path = path
+        # 変換済みの辞書。まだ使っていない辞書は _raw に読み込んだ JSON の形のまま置いておく
         self.dicts: Dict[str, List[Rule]] = {}
+        self._raw: Dict[str, list] = {}
+        # 最後に読み書きしたファイル内容のハッシュ（書き出す内容が同じなら save で書き込まない）
+        self._digest: Optional[bytes] = None
+        # names() の並び順（辞書の追加・削除・読み込みで None に戻す）
+        self._names: Optional[List[str]] = None
+
+        # 変更は mark_dirty で印を付け、少し待ってからまとめて1回だけ書き込む
+        self._tk: Optional[tk.Misc] = None
+        self._on_error: Optional[Callable[[Exception], None]] = None
+        self._dirty = False
+        self._flush_after_id = None
+
+    def attach(self, widget: tk.Misc, on_error: Optional[Callable[[Exception], None]] = None):
+        """遅延保存のタイマーに使う Tk ウィジェットを渡す（無ければ mark_dirty は即保存）"""
+        self._tk = widget
+        self._on_error = on_error
+
+    def mark_dirty(self):
+        self._dirty = True
+        if self._tk is None:
+            self.flush()
+            return
+        if self._flush_after_id is None:
+            self._flush_after_id = self._tk.after(self.FLUSH_DELAY_MS, self._flush)
+
+    def flush(self):
+        """
+        保留中の変更があれば今すぐ書き込む（終了時・辞書画面の保存など）。
+        書き込みに失敗したら変更は保留のまま残して再試行を予約し、例外はそのまま呼び出し元へ投げる
+        """
+        if self._flush_after_id is not None and self._tk is not None:
+            try:
+                self._tk.after_cancel(self._flush_after_id)
+            except Exception:
+                pass
+        self._flush_after_id = None
+        if not self._dirty:
+            return
+        try:
+            self.save()
+        except Exception:
+            if self._tk is not None:
+                self._flush_after_id = self._tk.after(self.RETRY_DELAY_MS, self._flush)
+            raise
+        self._dirty = False
+
+    def _flush(self):
+        # タイマーから呼ばれる。失敗は on_error で知らせる（再試行は flush が予約済み）
+        self._flush_after_id = None
+        try:
+            self.flush()
+        except Exception as e:
+            if self._on_error is None:
+                raise
+            self._on_error(e)
 
     def load(self):
+        self._names = None
+        self._raw = {}
         if not self.path.exists():
             migrated = self._try_migrate_from_old()
             if migrated:
@@ -169,74 +712,105 @@ class DictStore:
             return
 
         try:
-            data = json.loads(self.path.read_text(encoding="utf-8"))
+            buf = self.path.read_bytes()
+            data = _loads(buf)
             d = data.get("dicts", {})
-            out: Dict[str, List[Rule]] = {}
-            for name, rules_list in d.items():
-                rules: List[Rule] = []
-                for r in rules_list:
-                    rules.append(Rule(
-                        enabled=bool(r.get("enabled", True)),
-                        src=str(r.get("src", "")),
-                        dst=str(r.get("dst", "")),
-                    ))
-                out[str(name)] = rules
-            if not out:
-                out = {"default": []}
-            self.dicts = out
+            raw = {str(name): rules_list for name, rules_list in d.items() if isinstance(rules_list, list)}
+            if not raw:
+                raw = {"default": []}
+            self.dicts = {}
+            self._raw = raw
+            self._digest = _digest(buf)
         except Exception:
             self.dicts = {"default": []}
+            self._raw = {}
+            self._digest = None
+
+    def _materialize(self, name: str) -> List[Rule]:
+        raw = self._raw.pop(name)
+        try:
+            rules = _rules_from_json(raw)
+        except Exception:
+            rules = []
+        self.dicts[name] = rules
+        return rules
 
     def _try_migrate_from_old(self) -> bool:
         if not OLD_RULES_FILE.exists():
             return False
         try:
-            data = json.loads(OLD_RULES_FILE.read_text(encoding="utf-8"))
-            rules: List[Rule] = []
-            for r in data:
-                rules.append(Rule(
-                    enabled=bool(r.get("enabled", True)),
-                    src=str(r.get("src", "")),
-                    dst=str(r.get("dst", "")),
-                ))
-            self.dicts = {"default": rules}
+            data = _read_json(OLD_RULES_FILE)
+            self.dicts = {"default": _rules_from_json(data)}
             return True
         except Exception:
             return False
 
     def save(self):
-        payload = {
+        buf = _dumps(self._payload())
+        digest = _digest(buf)
+        if digest == self._digest and self.path.exists():
+            return
+
+        # 一時ファイルに書いてから置き換える（途中で落ちても元のファイルは壊れない）
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(buf)
+        os.replace(tmp, self.path)
+        self._digest = digest
+
+    def _payload(self) -> dict:
+        return {
             "version": 1,
+            # 並びは names() 順に固定（辞書を開いた順で書き出す内容が変わらないように）
+            # 未変換の辞書は読み込んだ JSON をそのまま書き戻す
             "dicts": {
-                name: [asdict(r) for r in rules]
-                for name, rules in self.dicts.items()
+                name: (
+                    [{"enabled": r.enabled, "src": r.src, "dst": r.dst} for r in self.dicts[name]]
+                    if name in self.dicts else self._raw[name]
+                )
+                for name in self.names()
             }
         }
-        self.path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def export(self, path: Path):
+        """人が読める形（インデント付き JSON）で書き出す"""
+        path.write_text(json.dumps(self._payload(), ensure_ascii=False, indent=2), encoding="utf-8")
 
     def names(self) -> List[str]:
-        return sorted(self.dicts.keys(), key=lambda s: (s != "default", s.lower()))
+        if self._names is None:
+            self._names = sorted(self.dicts.keys() | self._raw.keys(), key=lambda s: (s != "default", s.casefold()))
+        return list(self._names)
+
+    def exists(self, name: str) -> bool:
+        return name in self.dicts or name in self._raw
 
     def get_rules(self, name: str) -> List[Rule]:
-        if name not in self.dicts:
-            self.dicts[name] = []
-        return self.dicts[name]
+        rules = self.dicts.get(name)
+        if rules is not None:
+            return rules
+        if name in self._raw:
+            return self._materialize(name)
+        self.dicts[name] = rules = []
+        self._names = None
+        return rules
 
     def create(self, name: str) -> bool:
         name = name.strip()
-        if not name or name in self.dicts:
+        if not name or self.exists(name):
             return False
         self.dicts[name] = []
+        self._names = None
         return True
 
     def delete(self, name: str) -> bool:
         if name == "default":
             return False
-        if name not in self.dicts:
+        if not self.exists(name):
             return False
-        del self.dicts[name]
-        if "default" not in self.dicts:
+        self.dicts.pop(name, None)
+        self._raw.pop(name, None)
+        if not self.exists("default"):
             self.dicts["default"] = []
+        self._names = None
         return True
 
 
@@ -273,7 +847,7 @@ class ApplyPickerPopup(tk.Toplevel):
             except Exception:
                 pass
 
-        self.update_idletasks()
+        # アンカーのボタンは配置済みなので、レイアウトを確定させずにそのまま位置を読む
         x = anchor_widget.winfo_rootx()
         y = anchor_widget.winfo_rooty() + anchor_widget.winfo_height()
         self.geometry(f"+{x}+{y}")
@@ -295,77 +869,30 @@ class ApplyPickerPopup(tk.Toplevel):
         canvas.pack(side="left", fill="both", expand=True)
         vsb.pack(side="right", fill="y")
 
-        def _on_inner_configure(_e=None):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-            try:
-                req = inner.winfo_reqheight() + 4
-                canvas.configure(height=min(req, max_h))
-            except Exception:
-                pass
-
         def _on_canvas_configure(e):
             try:
                 canvas.itemconfigure(inner_id, width=e.width)
             except Exception:
                 pass
 
-        inner.bind("<Configure>", _on_inner_configure)
         canvas.bind("<Configure>", _on_canvas_configure)
 
-        # ホイール（トラックパッド含む）
-        self._wheel_bound = False
-
-        def _on_wheel(event):
-            try:
-                delta = getattr(event, "delta", 0)
-                if delta == 0:
-                    return "break"
-                units = int(-1 * (delta / 120))
-                if units == 0:
-                    units = -1 if delta > 0 else 1
-                canvas.yview_scroll(units, "units")
-            except Exception:
-                pass
-            return "break"
-
-        def _on_wheel_linux(event):
-            try:
-                if event.num == 4:
-                    canvas.yview_scroll(-1, "units")
-                elif event.num == 5:
-                    canvas.yview_scroll(1, "units")
-            except Exception:
-                pass
-            return "break"
-
-        def _bind_wheel(_e=None):
-            if self._wheel_bound:
-                return
-            self._wheel_bound = True
-            self.bind_all("<MouseWheel>", _on_wheel, add="+")
-            self.bind_all("<Button-4>", _on_wheel_linux, add="+")
-            self.bind_all("<Button-5>", _on_wheel_linux, add="+")
-
-        def _unbind_wheel(_e=None):
-            if not self._wheel_bound:
-                return
-            self._wheel_bound = False
-            try:
-                self.unbind_all("<MouseWheel>")
-                self.unbind_all("<Button-4>")
-                self.unbind_all("<Button-5>")
-            except Exception:
-                pass
-
-        for w in (canvas, inner, list_frame, outer):
-            w.bind("<Enter>", _bind_wheel, add="+")
-            w.bind("<Leave>", _unbind_wheel, add="+")
-
         for name in names:
             v = vars_by_name[name]
             cb = ttk.Checkbutton(inner, text=name, variable=v, command=self._changed)
             cb.pack(anchor="w")
 
+        # 一覧は開いている間は変わらないので、全部並べてから1回だけ測って高さを決める
+        # （inner の <Configure> ごとに測り直さない）
+        try:
+            inner.update_idletasks()
+            canvas.configure(
+                height=min(inner.winfo_reqheight() + 4, max_h),
+                scrollregion=(0, 0, inner.winfo_reqwidth(), inner.winfo_reqheight()),
+            )
+        except Exception:
+            pass
+
         sep = ttk.Separator(outer)
         sep.pack(fill="x", pady=(8, 6))
 
@@ -380,7 +907,9 @@ class ApplyPickerPopup(tk.Toplevel):
         self.bind("<Escape>", lambda _e: self.close())
         self.protocol("WM_DELETE_WINDOW", self.close)
 
-        self.after(1, _on_inner_configure)
+        # ホイール（トラックパッド含む）はポップアップ内のどこでも一覧をスクロール
+        register_wheel_area(self, canvas)
+        add_wheel_tag(self)
 
     def _changed(self):
         self.on_change()
@@ -394,24 +923,18 @@ class ApplyPickerPopup(tk.Toplevel):
         self.on_change()
 
     def _on_global_click(self, event):
-        w = event.widget
-        if self._is_descendant_of(w, self):
-            return
-        if w == self.anchor_widget or self._is_descendant_of(w, self.anchor_widget):
-            self.close()
+        # ポップアップの外（アンカーのボタンを含む）をクリックしたら閉じる
+        if self._is_descendant_of(event.widget, self):
             return
         self.close()
 
     @staticmethod
     def _is_descendant_of(widget, parent) -> bool:
-        try:
-            while widget is not None:
-                if widget == parent:
-                    return True
-                widget = widget.master
-        except Exception:
-            pass
-        return False
+        # Tk のウィジェット名は「親の名前.子の名前」なので、親を辿らず名前の前方一致で判定する
+        # （event.widget が文字列で来る場合もそのまま扱える）
+        w = str(widget)
+        p = str(parent)
+        return w == p or w.startswith(p + ".")
 
     def close(self):
         try:
@@ -440,29 +963,46 @@ class LineNumberCanvas(tk.Canvas):
         super().__init__(master, highlightthickness=0, **kwargs)
         self.text = text_widget
         self._after_id = None
+        # 行番号の text アイテムは作り直さず使い回す。_shown は各アイテムに今出ている (y, 行番号)
+        self._items: List[int] = []
+        self._shown: List[Optional[Tuple[int, str]]] = []
 
     def schedule_redraw(self):
-        if self._after_id is not None:
-            try:
-                self.after_cancel(self._after_id)
-            except Exception:
-                pass
-        self._after_id = self.after(10, self.redraw)
+        # 固定の待ち時間は置かず、同じイベント処理中に何度呼ばれてもアイドル時に1回だけ描き直す
+        if self._after_id is None:
+            self._after_id = self.after_idle(self.redraw)
 
     def redraw(self):
         self._after_id = None
-        self.delete("all")
+        items = self._items
+        shown = self._shown
 
+        n = 0
         i = self.text.index("@0,0")
         while True:
             d = self.text.dlineinfo(i)
             if d is None:
                 break
-            y = d[1]
-            line = i.split(".")[0]
-            self.create_text(4, y, anchor="nw", text=line, fill="#666666")
+            cur = (d[1], i.split(".")[0])
+            if n < len(items):
+                # 位置も番号も同じなら Tcl 側は触らない（入力中はほとんどこれ）
+                if shown[n] != cur:
+                    if shown[n] is None or shown[n][0] != cur[0]:
+                        self.coords(items[n], 4, cur[0])
+                    self.itemconfigure(items[n], text=cur[1], state="normal")
+                    shown[n] = cur
+            else:
+                items.append(self.create_text(4, cur[0], anchor="nw", text=cur[1], fill="#666666"))
+                shown.append(cur)
+            n += 1
             i = self.text.index(f"{i}+1line")
 
+        # 余ったアイテムは消さずに隠しておく
+        for k in range(n, len(items)):
+            if shown[k] is not None:
+                self.itemconfigure(items[k], state="hidden")
+                shown[k] = None
+
 
 # -----------------------------
 # Rule Manager (modeless + autosave + dict selector + singleton)
@@ -492,9 +1032,19 @@ class RuleManager(tk.Toplevel):
 
         self._save_after_id = None
         self._switching = False
+        self._prompt: Optional[PromptDialog] = None
+        # 最後の保存以降にモデルが変わったか（変わっていなければ perform_save は何もしない）
+        self._dirty = False
+
+        # 行は見えている分だけ作り、スクロールに合わせて使い回す
+        self._row_h: Optional[int] = None
+        self._hint: Optional[ttk.Label] = None
+        # 行の Entry は同じ名前付きフォントを共有する（Entry ごとにフォントを解決させない）
+        self._row_font = tkfont.nametofont("TkTextFont", root=self)
+        self._syncing_rows = False
 
         init_name = (initial_dict_name or "default").strip() or "default"
-        if init_name not in self.store.dicts:
+        if not self.store.exists(init_name):
             init_name = "default"
         self.dict_name_var = tk.StringVar(master=self, value=init_name)
 
@@ -516,10 +1066,11 @@ class RuleManager(tk.Toplevel):
 
         ttk.Label(topbar, text="編集辞書:").grid(row=0, column=0, sticky="w")
 
+        self._combo_names = self.store.names()
         self.dict_combo = ttk.Combobox(
             topbar,
             textvariable=self.dict_name_var,
-            values=self.store.names(),
+            values=self._combo_names,
             state="readonly",
             width=22,
         )
@@ -536,8 +1087,8 @@ class RuleManager(tk.Toplevel):
         ttk.Label(header, text="置換後").grid(row=0, column=3, sticky="w", padx=(10, 0))
         ttk.Label(header, text="操作", width=16).grid(row=0, column=4, sticky="e")
 
-        # ★ここでは wheel bind を ScrollableFrame に任せず、下の「全ウィジェットに直接bind」で確実化する
-        self.sf = ScrollableFrame(outer, enable_wheel_bind=False)
+        # ホイールは一覧の上だけでなくダイアログ全体で受けるので、領域の登録は下でダイアログ単位に行う
+        self.sf = ScrollableFrame(outer, enable_wheel_bind=False, on_viewport_change=self._sync_visible)
         self.sf.grid(row=2, column=0, sticky="nsew")
 
         footer = ttk.Frame(outer)
@@ -557,132 +1108,13 @@ class RuleManager(tk.Toplevel):
 
         self.protocol("WM_DELETE_WINDOW", self.close)
 
-        # ★macトラックパッドでも「どこでも」スクロールできるように（辞書ダイアログ配下へ直接bind）
-        self._install_wheel_bind_recursive_widgets()
-
-    def _on_rules_touchpad(self, event):
-        """
-        ★Tk 8.7+ などでトラックパッド2本指が <TouchpadScroll> になる環境用
-        event.delta (%D) は「dx,dy を詰めた値」になるので、tk::PreciseScrollDeltas があればそれで解凍。
-        """
-        try:
-            if not self.sf.winfo_exists() or not self.sf.canvas.winfo_exists():
-                return "break"
-        except Exception:
-            return "break"
-    
-        d = getattr(event, "delta", 0)
-        if d == 0:
-            return "break"
-    
-        dx = 0
-        dy = 0
-    
-        # Tk 8.7 の TIP 684: tk::PreciseScrollDeltas がある場合に dx,dy を取る
-        try:
-            # 戻り値は文字列のリストになる（例: "0 -3"）
-            parts = self.tk.call("tk::PreciseScrollDeltas", d)
-            # tk.call の戻りは tuple になる場合もあるので両対応
-            if isinstance(parts, (tuple, list)) and len(parts) >= 2:
-                dx = int(parts[0])
-                dy = int(parts[1])
-            else:
-                s = str(parts)
-                sp = s.split()
-                if len(sp) >= 2:
-                    dx = int(float(sp[0]))
-                    dy = int(float(sp[1]))
-        except Exception:
-            # PreciseScrollDeltas が無い環境では dy 相当として雑に扱う
-            dy = int(d)
-    
-        # dy が下方向なら +、上方向なら - にしたいので符号を調整
-        # Canvas の yview_scroll は「+で下へ」なので dy の符号を反転
-        units = 0
-        if dy != 0:
-            # 高頻度イベント対策：dyが小さいときは1行に丸める
-            units = -1 if dy > 0 else 1
-    
-        if units != 0:
-            try:
-                self.sf.canvas.yview_scroll(units, "units")
-            except Exception:
-                pass
-    
-        return "break"
-
-    # -----------------------------
-    # ★ macトラックパッドでも「どこでも」スクロール（辞書ダイアログ専用）
-    # -----------------------------
-    def _on_rules_wheel(self, event):
-        try:
-            if not self.sf.winfo_exists() or not self.sf.canvas.winfo_exists():
-                return "break"
-        except Exception:
-            return "break"
-
-        delta = getattr(event, "delta", 0)
-        if delta == 0:
-            return "break"
+        # ★macトラックパッド対策：ダイアログ配下のどこでホイールを回しても、ルール一覧をスクロールする。
+        # 後から作る行・案内ラベルには、作ったときにそれぞれタグを付ける
+        register_wheel_area(self, self.sf.canvas)
+        add_wheel_tag(self)
 
-        # トラックパッドは delta が小さいことがあるのでフォールバック
-        units = int(-delta / 120)
-        if units == 0:
-            units = -1 if delta > 0 else 1
-
-        try:
-            self.sf.canvas.yview_scroll(units, "units")
-        except Exception:
-            pass
-        return "break"
-
-    def _on_rules_wheel_linux(self, event):
-        try:
-            if not self.sf.winfo_exists() or not self.sf.canvas.winfo_exists():
-                return "break"
-        except Exception:
-            return "break"
-
-        try:
-            if event.num == 4:
-                self.sf.canvas.yview_scroll(-1, "units")
-            elif event.num == 5:
-                self.sf.canvas.yview_scroll(1, "units")
-        except Exception:
-            pass
-        return "break"
-
-    WHEEL_TAG = "RuleManagerWheelTag"
-
-    def _install_wheel_bind_recursive_widgets(self):
-        """
-        ★macトラックパッド対策：
-        ttk/tk標準のMouseWheel処理に“勝つ”ため、bindtags先頭に自前タグを入れて最優先で奪う。
-        """
-        # タグ(=bindtag)に対するクラスバインド（最優先で呼ばれたら break する）
-        try:
-            self.bind_class(self.WHEEL_TAG, "<MouseWheel>", self._on_rules_wheel)
-            self.bind_class(self.WHEEL_TAG, "<Shift-MouseWheel>", self._on_rules_wheel)  # 念のため
-            self.bind_class(self.WHEEL_TAG, "<TouchpadScroll>", self._on_rules_touchpad)
-            self.bind_class(self.WHEEL_TAG, "<Button-4>", self._on_rules_wheel_linux)
-            self.bind_class(self.WHEEL_TAG, "<Button-5>", self._on_rules_wheel_linux)
-        except Exception:
-            pass
-    
-        def _apply(w: tk.Widget):
-            try:
-                tags = list(w.bindtags())
-                if self.WHEEL_TAG not in tags:
-                    # ★先頭に入れる（標準クラスバインドより前に発火させる）
-                    tags.insert(0, self.WHEEL_TAG)
-                    w.bindtags(tuple(tags))
-            except Exception:
-                pass
-    
-            for c in w.winfo_children():
-                _apply(c)
-    
-        _apply(self)
+    # 表示範囲の外に余分に割り当てておく行数（少しのスクロールでは割り当て直さない）
+    OVERSCAN = 2
 
     # ---- front control ----
     def bring_to_front_no_focus(self):
@@ -710,7 +1142,10 @@ class RuleManager(tk.Toplevel):
 
     def refresh_dict_names(self):
         names = self.store.names()
-        self.dict_combo["values"] = names
+        # 一覧が変わっていなければ Combobox の values は設定し直さない
+        if names != self._combo_names:
+            self.dict_combo["values"] = names
+            self._combo_names = names
         cur = (self.dict_name_var.get().strip() or "default")
         if cur not in names:
             self.dict_name_var.set("default")
@@ -718,7 +1153,7 @@ class RuleManager(tk.Toplevel):
 
     def on_dict_change(self, _event=None):
         name = (self.dict_name_var.get().strip() or "default")
-        if name not in self.store.dicts:
+        if not self.store.exists(name):
             name = "default"
             self.dict_name_var.set("default")
         self._do_switch_dict(name)
@@ -752,36 +1187,125 @@ class RuleManager(tk.Toplevel):
                     pass
 
     def render_rows(self):
-        for child in self.sf.inner.winfo_children():
-            child.destroy()
-        self.row_widgets.clear()
+        """辞書の切替時など、モデル全体が入れ替わったときに表示を作り直す"""
+        try:
+            self.sf.canvas.yview_moveto(0.0)
+        except Exception:
+            pass
+        self._sync_visible(rebind=True)
 
-        for idx, rule in enumerate(self.rules):
-            self._create_row(idx, rule)
+    def _measure_row_height(self) -> int:
+        if self._row_h is None:
+            slot = self.row_widgets[0] if self.row_widgets else self._create_row()
+            try:
+                slot["frame"].update_idletasks()
+                self._row_h = slot["frame"].winfo_reqheight() + 8
+            except Exception:
+                self._row_h = 36
+        return self._row_h
 
-        if not self.rules:
-            hint = ttk.Label(self.sf.inner, text="「＋ 追加」でルールを作成できます。", foreground="gray")
-            hint.pack(anchor="w", padx=6, pady=10)
+    def _sync_visible(self, rebind: bool = False):
+        """
+        表示範囲に掛かる行だけウィジェットを割り当てる。
+        rebind=False（スクロール時）は、割り当てを変える前に画面上の編集をモデルへ書き戻す。
+        rebind=True はモデルを直接編集した直後で、モデル側を正とする。
+        """
+        if self._syncing_rows:
+            return
+        self._syncing_rows = True
+        try:
+            if not rebind:
+                self.commit_to_model()
+
+            n = len(self.rules)
+            row_h = self._measure_row_height()
+
+            if not n:
+                if self._hint is None:
+                    self._hint = ttk.Label(self.sf.inner, text="「＋ 追加」でルールを作成できます。", foreground="gray")
+                    add_wheel_tag(self._hint)
+                self._hint.place(x=6, y=10)
+                self.sf.inner.configure(height=row_h + 20)
+            else:
+                if self._hint is not None:
+                    self._hint.place_forget()
+                self.sf.inner.configure(height=n * row_h)
 
-        # ★行追加/再描画で新しく作られたEntry等にも再bind（macの取りこぼし防止）
-        self._install_wheel_bind_recursive_widgets()
+            # 表示範囲の上端（canvas 座標）から行番号を直接求め、上下に少し余分に割り当てておく
+            try:
+                y0 = int(self.sf.canvas.canvasy(0))
+                view_h = max(1, self.sf.canvas.winfo_height())
+            except Exception:
+                y0, view_h = 0, row_h * 10
+            first = max(0, min(n, y0 // row_h - self.OVERSCAN))
+            last = max(first, min(n, (y0 + view_h) // row_h + 1 + self.OVERSCAN))
+
+            while len(self.row_widgets) < last - first:
+                self._create_row()
+
+            # 行 i は常に row_widgets[i % size] に載せる。範囲が1行ずれても、入れ替わるのは
+            # 出入りした行のスロットだけで、残りは割り当ても内容もそのまま（編集中の Entry も動かない）
+            size = len(self.row_widgets)
+            for slot_no, slot in enumerate(self.row_widgets):
+                i = first + (slot_no - first) % size
+                if i >= last:
+                    if slot["index"] is not None:
+                        slot["index"] = None
+                        slot["frame"].place_forget()
+                    continue
+                if not rebind and slot["index"] == i:
+                    continue
+                rule = self.rules[i]
+                slot["index"] = i
+                # 同じ Rule を表示済みなら Tcl 変数への set は省く（入れ替え・削除で動かない行）
+                if slot["rule"] is not rule:
+                    slot["rule"] = rule
+                    slot["enabled"].set(rule.enabled)
+                    self._set_entry(slot["src"], rule.src)
+                    self._set_entry(slot["dst"], rule.dst)
+                slot["dirty"] = False
+                slot["frame"].place(x=0, y=i * row_h + 4, relwidth=1.0, height=row_h - 8)
+        finally:
+            self._syncing_rows = False
 
-    def _create_row(self, idx: int, rule: Rule):
+    def _create_row(self) -> dict:
         row = ttk.Frame(self.sf.inner)
-        row.pack(fill="x", pady=4)
 
-        v_enabled = tk.BooleanVar(master=self, value=rule.enabled)
-        v_src = tk.StringVar(master=self, value=rule.src)
-        v_dst = tk.StringVar(master=self, value=rule.dst)
+        v_enabled = tk.BooleanVar(master=self, value=True)
 
-        cb = ttk.Checkbutton(row, variable=v_enabled, command=self.schedule_save)
+        cb = ttk.Checkbutton(row, variable=v_enabled)
         cb.pack(side="left", padx=(2, 6))
 
-        e_src = tk.Entry(row, textvariable=v_src, bd=1, relief="solid")
+        # Entry は textvariable を持たせず、読み書きは get / insert で直接行う
+        # （キー入力のたびに Tcl 変数を経由しない）
+        e_src = tk.Entry(row, bd=1, relief="solid", font=self._row_font)
         e_src.pack(side="left", fill="x", expand=True, padx=(6, 6))
-        e_dst = tk.Entry(row, textvariable=v_dst, bd=1, relief="solid")
+        e_dst = tk.Entry(row, bd=1, relief="solid", font=self._row_font)
         e_dst.pack(side="left", fill="x", expand=True, padx=(6, 6))
 
+        slot = {
+            "frame": row,
+            "index": None,
+            "rule": None,
+            "enabled": v_enabled,
+            "src": e_src,
+            "dst": e_dst,
+            # 画面上で編集された行だけ commit_to_model で読み戻す
+            "dirty": False,
+        }
+
+        def _edited(_e=None, s=slot):
+            s["dirty"] = True
+
+        def _toggled():
+            _edited()
+            self.schedule_save()
+
+        cb.configure(command=_toggled)
+        for e in (e_src, e_dst):
+            for seq in ("<Key>", "<<Paste>>", "<<Cut>>", "<<Clear>>", "<<PasteSelection>>"):
+                e.bind(seq, _edited, add="+")
+
         e_src.bind("<FocusOut>", lambda _e: self.schedule_save())
         e_dst.bind("<FocusOut>", lambda _e: self.schedule_save())
         e_src.bind("<Return>", lambda _e: self.schedule_save())
@@ -790,20 +1314,31 @@ class RuleManager(tk.Toplevel):
         ops = ttk.Frame(row)
         ops.pack(side="right")
 
-        ttk.Button(ops, text="↑", width=3, command=lambda i=idx: self.move_row(i, -1)).pack(side="left", padx=(0, 4))
-        ttk.Button(ops, text="↓", width=3, command=lambda i=idx: self.move_row(i, +1)).pack(side="left", padx=(0, 8))
-        ttk.Button(ops, text="削除", command=lambda i=idx: self.delete_row(i)).pack(side="left")
+        ttk.Button(ops, text="↑", width=3, command=lambda s=slot: self._on_slot_action(s, self.move_row, -1)).pack(side="left", padx=(0, 4))
+        ttk.Button(ops, text="↓", width=3, command=lambda s=slot: self._on_slot_action(s, self.move_row, +1)).pack(side="left", padx=(0, 8))
+        ttk.Button(ops, text="削除", command=lambda s=slot: self._on_slot_action(s, self.delete_row)).pack(side="left")
 
-        self.row_widgets.append({
-            "enabled": v_enabled,
-            "src": v_src,
-            "dst": v_dst,
-        })
+        # ダイアログ全体と同じくホイールで一覧をスクロールさせる（Entry の上でも）
+        add_wheel_tag(row)
+        self.row_widgets.append(slot)
+        return slot
+
+    @staticmethod
+    def _set_entry(entry: tk.Entry, text: str):
+        entry.delete(0, "end")
+        if text:
+            entry.insert(0, text)
+
+    @staticmethod
+    def _on_slot_action(slot: dict, action, *args):
+        if slot["index"] is not None:
+            action(slot["index"], *args)
 
     def add_row(self):
         self.commit_to_model()
         self.rules.append(Rule(enabled=True, src="", dst=""))
-        self.render_rows()
+        self._dirty = True
+        self._sync_visible(rebind=True)
         self.schedule_save()
         self.on_message("行を追加しました（自動保存）")
 
@@ -812,17 +1347,26 @@ class RuleManager(tk.Toplevel):
         if idx < 0 or idx >= len(self.rules):
             return
         r = self.rules[idx]
-        ok = messagebox.askyesno(
-            "削除確認",
-            f"この行を削除しますか？\n\n置換前: {r.src}\n置換後: {r.dst}",
-            parent=self
-        )
-        if not ok:
-            return
-        self.rules.pop(idx)
-        self.render_rows()
-        self.perform_save()
-        self.on_message("行を削除しました（自動保存）")
+
+        def _done(ok: bool):
+            if not ok:
+                return
+            # 確認中に並びが変わっていても、確認した Rule そのものを消す
+            i = next((k for k, x in enumerate(self.rules) if x is r), None)
+            if i is None:
+                return
+            self.rules.pop(i)
+            self._dirty = True
+            self._sync_visible(rebind=True)
+            self.perform_save()
+            self.on_message("行を削除しました（自動保存）")
+
+        self.prompt().ask("削除確認", f"この行を削除しますか？\n\n置換前: {r.src}\n置換後: {r.dst}", _done)
+
+    def prompt(self) -> PromptDialog:
+        if self._prompt is None or not self._prompt.winfo_exists():
+            self._prompt = PromptDialog(self)
+        return self._prompt
 
     def move_row(self, idx: int, direction: int):
         self.commit_to_model()
@@ -830,19 +1374,31 @@ class RuleManager(tk.Toplevel):
         if new_idx < 0 or new_idx >= len(self.rules):
             return
         self.rules[idx], self.rules[new_idx] = self.rules[new_idx], self.rules[idx]
-        self.render_rows()
+        self._dirty = True
+        self._sync_visible(rebind=True)
         self.perform_save()
         self.on_message("行の順番を変更しました（自動保存）")
 
     def commit_to_model(self):
-        new_rules: List[Rule] = []
+        # 画面に出ている行のうち、編集された行だけ書き戻す
         for rw in self.row_widgets:
-            new_rules.append(Rule(
-                enabled=bool(rw["enabled"].get()),
-                src=rw["src"].get(),
-                dst=rw["dst"].get(),
-            ))
-        self.rules[:] = new_rules
+            if not rw["dirty"]:
+                continue
+            rw["dirty"] = False
+            i = rw["index"]
+            if i is None or i >= len(self.rules):
+                continue
+            enabled = bool(rw["enabled"].get())
+            src = rw["src"].get()
+            dst = rw["dst"].get()
+            rule = self.rules[i]
+            if (enabled, src, dst) == (rule.enabled, rule.src, rule.dst):
+                rw["rule"] = rule
+                continue
+            rule = Rule(enabled=enabled, src=sys.intern(src), dst=sys.intern(dst))
+            self.rules[i] = rule
+            rw["rule"] = rule
+            self._dirty = True
 
     def schedule_save(self):
         if self._switching:
@@ -857,8 +1413,13 @@ class RuleManager(tk.Toplevel):
     def perform_save(self):
         self._save_after_id = None
         self.commit_to_model()
+        if not self._dirty:
+            return
+        self._dirty = False
         try:
             self.on_save_store()
+            # 遅延保存に任せず今書き込む（「保存しました」は実際に書けたときだけ出す）
+            self.store.flush()
             self.on_message("保存しました")
             if self.on_saved_callback:
                 try:
@@ -866,9 +1427,34 @@ class RuleManager(tk.Toplevel):
                 except Exception:
                     pass
         except Exception as e:
+            self._dirty = True
             self.on_message(f"保存に失敗: {e}")
 
 
+def decode_text(data: bytes) -> str:
+    """
+    読み込んだバイト列を文字列にする。BOM があればそれに従い、無ければ UTF-8 → cp932 の順に試す。
+    どちらでも読めず charset_normalizer があれば、その推定結果で解釈する。
+    """
+    if data.startswith(b"\xef\xbb\xbf"):
+        return data[3:].decode("utf-8")
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16")
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    try:
+        return data.decode("cp932")
+    except UnicodeDecodeError:
+        if charset_normalizer is None:
+            raise
+        best = charset_normalizer.from_bytes(data).best()
+        if best is None:
+            raise
+        return str(best)
+
+
 def resource_path(rel: str) -> str:
     base = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent))
     return str(base / rel)
@@ -921,6 +1507,9 @@ class App(tk.Tk):
 
         # settings
         self._last_save_dir: Optional[Path] = None
+        # 設定ファイルに今書かれている内容（同じなら書き直さない）
+        self._settings_on_disk: Optional[str] = None
+        self._cascade_replace = False
         self._load_settings()
 
         # window size
@@ -939,6 +1528,7 @@ class App(tk.Tk):
 
         self.store = DictStore(DICT_STORE_FILE)
         self.store.load()
+        self.store.attach(self, on_error=lambda e: self.set_message(f"保存に失敗: {e}"))
 
         self.tooltip = Tooltip(self)
 
@@ -948,6 +1538,7 @@ class App(tk.Tk):
         self.apply_vars: Dict[str, tk.BooleanVar] = {}
         self.apply_button = None
         self._apply_popup: Optional[ApplyPickerPopup] = None
+        self._prompt: Optional[PromptDialog] = None
 
         self.message_var = tk.StringVar(value="")
 
@@ -957,8 +1548,22 @@ class App(tk.Tk):
         self._text_font = tkfont.Font(family="TkDefaultFont", size=self._base_font_size)
 
         self._syncing = False
+        # 入力・出力の同期ホイールは量だけ貯めておき、アイドル時にまとめて1回スクロールする
+        self._wheel_units = 0
+        self._wheel_after_id = None
+
+        # 入力・出力全体の文字列（Tk から毎回取り出さない。入力は <<Modified>>、出力は modified フラグで無効化）
+        self._input_text: Optional[str] = None
+        self._output_text: Optional[str] = None
 
         self._in_hl_after_id = None
+        # 次の色付けで全体をやり直すか／編集された範囲（マーク hl_first〜hl_last）だけで済むか
+        self._in_hl_full = True
+        self._in_hl_dirty = False
+        # 入力が編集された回数と、前回色付けしたときの (RuleMatcher, 編集回数)。
+        # 両方同じなら全体のやり直しを頼まれても結果は変わらないので何もしない
+        self._input_gen = 0
+        self._last_hl_fp: Optional[tuple] = None
         self._in_hl_tag = "src_target"
         self._in_hl_color = "#ffd6e7"
 
@@ -969,6 +1574,17 @@ class App(tk.Tk):
         self._progress_win = None
         self._progress_bar = None
 
+        # 置換用にコンパイルしたルールのキャッシュ（ルールの (src, dst) 列が変わったら作り直す）。
+        # (元のリスト, キー, RuleMatcher) の組で持ち、UI スレッドとワーカーの両方から1回の代入で差し替える
+        self._compiled: Optional[Tuple[List[Rule], tuple, RuleMatcher]] = None
+
+        # 使用辞書の有効ルール一覧（ルール保存・使用辞書の変更で None に戻す）
+        self._enabled_cache: Optional[List[Rule]] = None
+        self._rules_cache: Dict[Tuple[str, ...], List[Rule]] = {}
+
+        # 置換計算はワーカースレッドで行い、結果は after でポーリングして UI スレッドで反映
+        self._pool = ThreadPoolExecutor(max_workers=1)
+
         # ---------- TOP MENUS ----------
         top = ttk.Frame(self, padding=(10, 8, 10, 6))
         top.pack(fill="x")
@@ -1015,10 +1631,11 @@ class App(tk.Tk):
 
         ttk.Label(row2, text="編集辞書:").pack(side="left")
 
+        self._edit_combo_names = self.store.names()
         self.edit_combo = ttk.Combobox(
             row2,
             textvariable=self.edit_dict_name_var,
-            values=self.store.names(),
+            values=self._edit_combo_names,
             state="readonly",
             width=18
         )
@@ -1027,13 +1644,22 @@ class App(tk.Tk):
 
         ttk.Button(row2, text="辞書新規", command=self.create_dictionary).pack(side="left", padx=(0, 6))
         ttk.Button(row2, text="辞書削除", command=self.delete_dictionary).pack(side="left", padx=(0, 10))
-        ttk.Button(row2, text="辞書（ルール）", command=self.open_rules).pack(side="left")
+        ttk.Button(row2, text="辞書（ルール）", command=self.open_rules).pack(side="left", padx=(0, 6))
+        ttk.Button(row2, text="辞書エクスポート", command=self.export_dictionaries).pack(side="left")
 
         ttk.Label(row3, text="表示:").pack(side="left")
         zoom = ttk.Combobox(row3, textvariable=self.zoom_var, values=self.zoom_values, state="readonly", width=8)
         zoom.pack(side="left", padx=(6, 10))
         zoom.bind("<<ComboboxSelected>>", self.on_zoom_change)
 
+        self.cascade_var = tk.BooleanVar(value=self._cascade_replace)
+        ttk.Checkbutton(
+            row3,
+            text="連鎖置換（上のルールの置換結果にも下のルールを適用）",
+            variable=self.cascade_var,
+            command=self.on_cascade_change,
+        ).pack(side="left")
+
         msg = ttk.Label(top, textvariable=self.message_var, foreground="gray")
         msg.pack(anchor="w", pady=(6, 0))
 
@@ -1068,7 +1694,12 @@ class App(tk.Tk):
         self.in_vsb.grid(row=0, column=2, sticky="ns")
 
         self.input.tag_configure(self._in_hl_tag, background=self._in_hl_color)
-        self.input.bind("<KeyRelease>", lambda _e: self.schedule_input_highlight(), add="+")
+        # 打鍵ごとの編集は <Key>（編集される前）と <<Modified>> で範囲を記録し、その周辺の行だけ色付けし直す。
+        # 貼り付け・切り取り・Undo/Redo は変わる範囲がカーソル位置から読めないので全体をやり直す。
+        self.input.bind("<Key>", self._on_input_key, add="+")
+        self.input.bind("<<Modified>>", self._on_input_modified, add="+")
+        for seq in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>", "<<Undo>>", "<<Redo>>"):
+            self.input.bind(seq, lambda _e: self.schedule_input_highlight(), add="+")
         self.input.bind("<ButtonRelease-1>", lambda _e: self.input_ln.schedule_redraw(), add="+")
         self.input.bind("<Configure>", lambda _e: self.input_ln.schedule_redraw(), add="+")
 
@@ -1078,7 +1709,8 @@ class App(tk.Tk):
         out_container.columnconfigure(1, weight=1)
         out_container.rowconfigure(0, weight=1)
 
-        self.output = tk.Text(out_container, wrap="char", font=self._text_font)
+        # 出力は置換結果の表示専用なので undo 履歴は持たない
+        self.output = tk.Text(out_container, wrap="char", undo=False, font=self._text_font)
         self.output_ln = LineNumberCanvas(out_container, self.output, width=44, bg="#f3f3f3")
         self.out_vsb = ttk.Scrollbar(out_container, orient="vertical", command=lambda *a: self._scroll_both(*a))
         self.output.configure(yscrollcommand=self._on_output_yscroll)
@@ -1087,16 +1719,24 @@ class App(tk.Tk):
         self.output.grid(row=0, column=1, sticky="nsew")
         self.out_vsb.grid(row=0, column=2, sticky="ns")
 
+        self.output.tag_configure("chg", background="#fff3b0")
         self.output.bind("<Motion>", self.on_hover)
-        self.output.bind("<Leave>", lambda _e: self.tooltip.hide())
+        self.output.bind("<Leave>", self._on_output_leave)
+        self.output.bind("<<Modified>>", self._on_output_modified, add="+")
         self.output.bind("<ButtonRelease-1>", lambda _e: self.output_ln.schedule_redraw(), add="+")
         self.output.bind("<Configure>", lambda _e: self.output_ln.schedule_redraw(), add="+")
 
         self._bind_sync_wheel(self.input)
         self._bind_sync_wheel(self.output)
 
-        self.tag_map: Dict[str, str] = {}
-        self._last_hover_tag: Optional[str] = None
+        # 出力の置換箇所 k の置換前（ホバー表示用）。位置は各置換箇所の先頭に置いたマーク chg_k で持つので、
+        # 出力を手で編集しても文字と一緒に動く
+        self._span_before: List[str] = []
+        self._last_hover_span: Optional[str] = None
+        # 前回調べた文字位置。同じ文字の上での移動なら探索も表示の更新もしない
+        self._last_hover_index: Optional[str] = None
+        self._hover_pending = None
+        self._last_xy = (-9, -9)
 
         if not self.input.get("1.0", "end-1c").strip():
             self.input.insert("1.0", "ここに貼り付け → 置換実行\n")
@@ -1168,8 +1808,7 @@ class App(tk.Tk):
     
             # ついでに行番号
             try:
-                self.input_ln.schedule_redraw()
-                self.output_ln.schedule_redraw()
+                self.schedule_line_numbers()
             except Exception:
                 pass
     
@@ -1186,12 +1825,15 @@ class App(tk.Tk):
         try:
             if not SETTINGS_FILE.exists():
                 return
-            data = json.loads(SETTINGS_FILE.read_text(encoding="utf-8"))
+            raw = SETTINGS_FILE.read_text(encoding="utf-8")
+            self._settings_on_disk = raw
+            data = json.loads(raw)
             last_dir = data.get("last_save_dir")
             if last_dir:
                 p = Path(str(last_dir))
                 if p.exists() and p.is_dir():
                     self._last_save_dir = p
+            self._cascade_replace = bool(data.get("cascade_replace", False))
         except Exception:
             pass
 
@@ -1200,8 +1842,16 @@ class App(tk.Tk):
             payload = {
                 "version": 1,
                 "last_save_dir": str(self._last_save_dir) if self._last_save_dir else "",
+                "cascade_replace": bool(self.cascade_var.get()),
             }
-            SETTINGS_FILE.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+            text = json.dumps(payload, ensure_ascii=False, indent=2)
+            if text == self._settings_on_disk and SETTINGS_FILE.exists():
+                return
+            # 辞書と同じく一時ファイルに書いてから置き換える
+            tmp = SETTINGS_FILE.with_name(SETTINGS_FILE.name + ".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, SETTINGS_FILE)
+            self._settings_on_disk = text
         except Exception:
             pass
 
@@ -1211,7 +1861,22 @@ class App(tk.Tk):
                 self._rule_manager_dialog.close()
         except Exception:
             pass
+        # まとめて書き出すのを待っている辞書の変更を書き出す。失敗したら知らせ、やり直すか閉じるのをやめるかを選ばせる
+        while True:
+            try:
+                self.store.flush()
+                break
+            except Exception as e:
+                if not messagebox.askretrycancel(
+                    "保存エラー", f"辞書の保存に失敗しました:\n{e}\n\n取り消すと終了しません。", parent=self
+                ):
+                    return
         self._save_settings()
+        try:
+            self._pool.shutdown(wait=False)
+        except Exception:
+            pass
+        self.tooltip.close()
         try:
             self.destroy()
         except Exception:
@@ -1228,12 +1893,20 @@ class App(tk.Tk):
         self.message_var.set(text)
 
     def on_zoom_change(self, _event=None):
-        self.apply_zoom(self.zoom_var.get())
-        self.input_ln.schedule_redraw()
-        self.output_ln.schedule_redraw()
+        if not self.apply_zoom(self.zoom_var.get()):
+            return
+        self.schedule_line_numbers()
         self.schedule_input_highlight()
 
-    def apply_zoom(self, percent_text: str):
+    def on_cascade_change(self):
+        if self.cascade_var.get():
+            self.set_message("連鎖置換: 上のルールから順に適用します")
+        else:
+            self.set_message("一括置換: 入力を1回だけ走査し、最長一致で置換します")
+        self._save_settings()
+
+    def apply_zoom(self, percent_text: str) -> bool:
+        """文字サイズを変える。同じ大きさなら何もせず False（フォント変更は全行の測り直しになる）"""
         try:
             p = int(percent_text.replace("%", "").strip())
         except Exception:
@@ -1241,7 +1914,10 @@ class App(tk.Tk):
         p = max(50, min(400, p))
         scale = p / 100.0
         size = max(8, int(round(self._base_font_size * scale)))
+        if size == int(self._text_font.cget("size")):
+            return False
         self._text_font.configure(size=size)
+        return True
 
     # --- progress / lock ---
     def _set_edit_lock(self, locked: bool):
@@ -1313,6 +1989,14 @@ class App(tk.Tk):
         self._progress_win = None
 
     # --- sync scroll ---
+    def schedule_line_numbers(self):
+        """
+        入力・出力の行番号をまとめて描き直す予約。各 LineNumberCanvas は予約済みなら積み増さないので、
+        ホイール1刻みやスクロール通知が何回続いても、描き直しはアイドル時にそれぞれ1回だけ
+        """
+        self.input_ln.schedule_redraw()
+        self.output_ln.schedule_redraw()
+
     def _scroll_both(self, *args):
         if self._syncing:
             return
@@ -1320,8 +2004,7 @@ class App(tk.Tk):
         try:
             self.input.yview(*args)
             self.output.yview(*args)
-            self.input_ln.schedule_redraw()
-            self.output_ln.schedule_redraw()
+            self.schedule_line_numbers()
         finally:
             self._syncing = False
 
@@ -1334,8 +2017,7 @@ class App(tk.Tk):
         try:
             self.output.yview_moveto(first)
             self.out_vsb.set(first, last)
-            self.input_ln.schedule_redraw()
-            self.output_ln.schedule_redraw()
+            self.schedule_line_numbers()
         finally:
             self._syncing = False
 
@@ -1348,8 +2030,7 @@ class App(tk.Tk):
         try:
             self.input.yview_moveto(first)
             self.in_vsb.set(first, last)
-            self.input_ln.schedule_redraw()
-            self.output_ln.schedule_redraw()
+            self.schedule_line_numbers()
         finally:
             self._syncing = False
 
@@ -1362,29 +2043,31 @@ class App(tk.Tk):
         delta = getattr(event, "delta", 0)
         if delta == 0:
             return "break"
-        units = int(-1 * (delta / 120))
-        if units == 0:
-            units = -1 if delta > 0 else 1
-        self._syncing = True
-        try:
-            self.input.yview_scroll(units, "units")
-            self.output.yview_scroll(units, "units")
-            self.input_ln.schedule_redraw()
-            self.output_ln.schedule_redraw()
-        finally:
-            self._syncing = False
+        self._queue_wheel(wheel_units(delta))
         return "break"
 
     def _on_wheel_linux(self, direction: int):
+        self._queue_wheel(direction)
+        return "break"
+
+    def _queue_wheel(self, units: int):
+        # トラックパッドは1秒に何十回も来るので、続けて届いた分はアイドル時の1回にまとめる
+        self._wheel_units += units
+        if self._wheel_after_id is None:
+            self._wheel_after_id = self.after_idle(self._flush_wheel)
+
+    def _flush_wheel(self):
+        self._wheel_after_id = None
+        units, self._wheel_units = self._wheel_units, 0
+        if units == 0:
+            return
         self._syncing = True
         try:
-            self.input.yview_scroll(direction, "units")
-            self.output.yview_scroll(direction, "units")
-            self.input_ln.schedule_redraw()
-            self.output_ln.schedule_redraw()
+            self.input.yview_scroll(units, "units")
+            self.output.yview_scroll(units, "units")
+            self.schedule_line_numbers()
         finally:
             self._syncing = False
-        return "break"
 
     # --- dict selection ---
     def current_edit_dict_name(self) -> str:
@@ -1437,7 +2120,31 @@ class App(tk.Tk):
                 selected = [edit]
         return selected
 
+    def enabled_rules(self) -> List[Rule]:
+        """使用辞書の有効ルール（src が空のものを除く）を上から順に返す"""
+        if self._enabled_cache is None:
+            self._enabled_cache = self._enabled_rules_for(self.selected_apply_dicts())
+        return self._enabled_cache
+
+    def _enabled_rules_for(self, selected: List[str]) -> List[Rule]:
+        # 使用辞書の組み合わせごとに覚えておく（選択を切り替えて戻したときに辞書を辿り直さない）。
+        # 順番は優先順位なので、キーは並べ替えずに names() 順のまま使う
+        key = tuple(selected)
+        rules = self._rules_cache.get(key)
+        if rules is None:
+            rules = []
+            for dn in selected:
+                rules.extend([r for r in self.store.get_rules(dn) if r.enabled and r.src != ""])
+            self._rules_cache[key] = rules
+        return rules
+
+    def invalidate_rules_cache(self):
+        """ルールの中身や辞書の増減があったとき。選択だけが変わったときは _enabled_cache だけ捨てる"""
+        self._enabled_cache = None
+        self._rules_cache.clear()
+
     def on_apply_selection_change(self):
+        self._enabled_cache = None
         selected = self.selected_apply_dicts()
         if len(selected) == 1:
             self.apply_button.config(text=selected[0])
@@ -1459,8 +2166,27 @@ class App(tk.Tk):
             except Exception:
                 pass
 
+    def prompt(self) -> PromptDialog:
+        if self._prompt is None or not self._prompt.winfo_exists():
+            self._prompt = PromptDialog(self)
+        return self._prompt
+
+    def refresh_dict_names(self):
+        """辞書の追加・削除後に、編集辞書の一覧と開いている辞書ダイアログの一覧を更新する"""
+        names = self.store.names()
+        if names != self._edit_combo_names:
+            self.edit_combo["values"] = names
+            self._edit_combo_names = names
+        if self._rule_manager_dialog is not None and self._rule_manager_dialog.winfo_exists():
+            try:
+                self._rule_manager_dialog.refresh_dict_names()
+            except Exception:
+                pass
+
     def create_dictionary(self):
-        name = simpledialog.askstring("辞書を新規作成", "辞書名を入力してください", parent=self)
+        self.prompt().ask("辞書を新規作成", "辞書名を入力してください", self._create_dictionary_named, entry=True)
+
+    def _create_dictionary_named(self, name: Optional[str]):
         if not name:
             return
         name = name.strip()
@@ -1469,8 +2195,9 @@ class App(tk.Tk):
         if not self.store.create(name):
             messagebox.showwarning("作成できません", "その辞書名は既に存在するか、無効な名前です。", parent=self)
             return
-        self.store.save()
-        self.edit_combo["values"] = self.store.names()
+        self.invalidate_rules_cache()
+        self.store.mark_dirty()
+        self.refresh_dict_names()
         self.edit_dict_name_var.set(name)
         self.build_apply_menu(initial_select_edit=True)
         self.set_message(f"辞書を作成しました: {name}")
@@ -1481,21 +2208,29 @@ class App(tk.Tk):
         if name == "default":
             messagebox.showinfo("削除できません", "default 辞書は削除できません。", parent=self)
             return
-        ok = messagebox.askyesno("削除確認", f"辞書「{name}」を削除しますか？\n（中のルールも消えます）", parent=self)
-        if not ok:
-            return
+        self.prompt().ask(
+            "削除確認",
+            f"辞書「{name}」を削除しますか？\n（中のルールも消えます）",
+            lambda ok: self._delete_dictionary_named(name) if ok else None,
+        )
+
+    def _delete_dictionary_named(self, name: str):
         if not self.store.delete(name):
             messagebox.showwarning("削除できません", "削除に失敗しました。", parent=self)
             return
-        self.store.save()
-        self.edit_combo["values"] = self.store.names()
+        self.invalidate_rules_cache()
+        self.store.mark_dirty()
+        self.refresh_dict_names()
         self.edit_dict_name_var.set("default")
         self.build_apply_menu(initial_select_edit=True)
         self.set_message(f"辞書を削除しました: {name}")
         self.schedule_input_highlight()
 
     # --- input highlight ---
-    def schedule_input_highlight(self):
+    def schedule_input_highlight(self, full: bool = True):
+        """入力の色付けを少し遅らせて行う。full=False は _on_input_modified が記録した範囲だけ"""
+        if full:
+            self._in_hl_full = True
         if self._in_hl_after_id is not None:
             try:
                 self.after_cancel(self._in_hl_after_id)
@@ -1503,42 +2238,118 @@ class App(tk.Tk):
                 pass
         self._in_hl_after_id = self.after(120, self.refresh_input_highlight)
 
-    def refresh_input_highlight(self):
-        self._in_hl_after_id = None
+    def input_text(self) -> str:
+        """
+        入力全体の文字列。編集されるまでは前回 Tk から取り出したものを返す。
+        <<Modified>> の処理より先に呼ばれても古い文字列を返さないよう、modified フラグが立っていれば取り出し直す
+        """
+        if self._input_text is None or self.input.edit_modified():
+            self._input_text = self.input.get("1.0", "end-1c")
+        return self._input_text
+
+    def output_text(self) -> str:
+        """出力全体の文字列。_write_output で書いたものを持っておき、手で編集されたときだけ取り出し直す"""
+        if self._output_text is None or self.output.edit_modified():
+            self._output_text = self.output.get("1.0", "end-1c")
+        return self._output_text
+
+    def _on_output_modified(self, _event=None):
+        # 置換後の出力は編集できる。chg タグとマークは文字と一緒に動くので、捨てるのはテキストのキャッシュだけ
         try:
-            self.input.tag_remove(self._in_hl_tag, "1.0", "end")
-        except Exception:
+            if not self.output.edit_modified():
+                return
+            self.output.edit_modified(False)
+        except tk.TclError:
+            return
+        self._output_text = None
+        self._last_hover_index = None
+
+    def _on_input_modified(self, _event=None):
+        w = self.input
+        self._input_text = None
+        # <<Modified>> は modified フラグが変わったときにしか来ないので、毎回戻して次の編集も拾う。
+        # 戻したこと自体でもう一度呼ばれるが、そのときはフラグが立っていないので何もしない
+        try:
+            if not w.edit_modified():
+                return
+            w.edit_modified(False)
+        except tk.TclError:
+            return
+        self._input_gen += 1
+        self._record_input_dirty("insert", "insert")
+        self.schedule_input_highlight(full=False)
+
+    def _on_input_key(self, _event=None):
+        """
+        打鍵は Text のクラスバインドより先にここへ来るので、編集される前のカーソルと選択範囲を記録する。
+        <<Modified>> は後からまとめて1回しか来ないため、続けて打たれた分の位置もここで拾う
+        """
+        try:
+            if self.input.tag_ranges("sel"):
+                self._record_input_dirty("sel.first", "sel.last")
+            self._record_input_dirty("insert", "insert")
+        except tk.TclError:
             pass
 
-        dict_names = self.selected_apply_dicts()
-        src_list: List[str] = []
-        for dn in dict_names:
-            for r in self.store.get_rules(dn):
-                if r.enabled and r.src:
-                    src_list.append(r.src)
-
-        seen = set()
-        uniq_src = []
-        for s in src_list:
-            if s in seen:
-                continue
-            seen.add(s)
-            uniq_src.append(s)
+    def _record_input_dirty(self, first: str, last: str):
+        """first〜last を次の部分色付けの範囲に足す"""
+        w = self.input
+        if not self._in_hl_full:
+            # 前後 1 行を含めて記録する（改行の挿入・削除で隣の行とつながるため）。
+            # 行番号ではなくマークで持つので、続く編集で行がずれても範囲が一緒に動く
+            lo = w.index(f"{first} -1line linestart")
+            hi = w.index(f"{last} +1line lineend")
+            if not self._in_hl_dirty:
+                w.mark_set("hl_first", lo)
+                w.mark_gravity("hl_first", "left")
+                w.mark_set("hl_last", hi)
+                w.mark_gravity("hl_last", "right")
+                self._in_hl_dirty = True
+            else:
+                if w.compare(lo, "<", "hl_first"):
+                    w.mark_set("hl_first", lo)
+                if w.compare(hi, ">", "hl_last"):
+                    w.mark_set("hl_last", hi)
 
-        if not uniq_src:
+    def refresh_input_highlight(self):
+        self._in_hl_after_id = None
+        full, dirty = self._in_hl_full, self._in_hl_dirty
+        self._in_hl_full = False
+        self._in_hl_dirty = False
+
+        # 照合には置換と同じ RuleMatcher（ルールが変わったときだけ作り直す）を使う。
+        # 長い順の並べ替えや src ごとの絞り込みを打鍵のたびにやり直さない
+        matcher = self._get_matcher(self.enabled_rules())
+        fp = (matcher, self._input_gen)
+        if full and fp == self._last_hl_fp:
+            # 倍率変更や編集用辞書の切り替えなど、ルールも入力も変わっていない再色付けは省く
             return
+        # 改行を含む src は編集範囲の外までまたがり得るので、そのときは全体をやり直す
+        if matcher.multiline:
+            full = True
+        if full:
+            start, stop = "1.0", "end-1c"
+        elif dirty:
+            start = self.input.index("hl_first linestart")
+            stop = self.input.index("hl_last lineend")
+        else:
+            return
+        self._last_hl_fp = fp
 
-        uniq_src.sort(key=len, reverse=True)
+        try:
+            self.input.tag_remove(self._in_hl_tag, start, stop)
+        except Exception:
+            pass
 
-        for needle in uniq_src:
-            start = "1.0"
-            while True:
-                pos = self.input.search(needle, start, stopindex="end")
-                if not pos:
-                    break
-                end = f"{pos}+{len(needle)}c"
-                self.input.tag_add(self._in_hl_tag, pos, end)
-                start = end
+        # 範囲の先頭は常に行頭なので、範囲内の "行.列" は行番号をずらすだけで Tk のインデックスになる
+        text = self.input_text() if full else self.input.get(start, stop)
+        offsets = [off for span in matcher.iter_spans(text) for off in span]
+        if not offsets:
+            return
+        first_line = int(start.split(".")[0])
+        ranges = offsets_to_indices(line_starts_of(text), offsets, first_line)
+        # 1回の tag add にすべての範囲を渡す
+        self.input.tag_add(self._in_hl_tag, *ranges)
 
         self.input_ln.schedule_redraw()
 
@@ -1552,19 +2363,29 @@ class App(tk.Tk):
             return
         p = Path(path)
         try:
-            content = p.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            try:
-                content = p.read_text(encoding="cp932")
-            except Exception as e:
-                messagebox.showerror("読み込みエラー", f"文字コードの判定に失敗しました:\n{e}", parent=self)
-                return
+            data = p.read_bytes()
         except Exception as e:
             messagebox.showerror("読み込みエラー", str(e), parent=self)
             return
 
-        self.input.delete("1.0", "end")
-        self.input.insert("1.0", content)
+        # 読み込みは1回だけ。文字コードの判定は同じバイト列に対して decode_text で行う
+        try:
+            content = decode_text(data)
+        except Exception as e:
+            messagebox.showerror("読み込みエラー", f"文字コードの判定に失敗しました:\n{e}", parent=self)
+            return
+
+        # 読み込みは取り消しの対象にしない（ファイル全体を Undo 履歴に積まない）。
+        # それまでの履歴も別の内容に対するものなので捨てる
+        self.input.config(undo=False)
+        try:
+            self.input.delete("1.0", "end")
+            self.input.insert("1.0", content)
+        finally:
+            self.input.config(undo=True)
+        self.input.edit_reset()
+        self._input_text = content
+        self.schedule_input_highlight()
 
         try:
             self.update_idletasks()            # geometry/layout を確定
@@ -1576,6 +2397,7 @@ class App(tk.Tk):
             pass
 
         # OUTをクリア
+        self.clear_highlight()
         self.output.config(state="normal")
         self.output.delete("1.0", "end")
         self.output.config(state="normal")  # ← disabledにしていないのでnormalのままでOK
@@ -1590,8 +2412,28 @@ class App(tk.Tk):
         if sys.platform == "darwin":
             self._refresh_thumbs_after_load()
 
+    def export_dictionaries(self):
+        initialdir = str(self._last_save_dir) if self._last_save_dir and self._last_save_dir.exists() else None
+        path = filedialog.asksaveasfilename(
+            title="辞書をエクスポート",
+            defaultextension=".json",
+            filetypes=[("JSON file", "*.json"), ("All files", "*.*")],
+            initialdir=initialdir,
+            initialfile="text_replace_dictionaries.json",
+        )
+        if not path:
+            return
+        p = Path(path)
+        try:
+            self.store.export(p)
+        except Exception as e:
+            messagebox.showerror("エクスポートエラー", str(e), parent=self)
+            return
+        self.set_message(f"辞書をエクスポートしました: {p.name}")
+
     def save_rules(self):
-        self.store.save()
+        self.invalidate_rules_cache()
+        self.store.mark_dirty()
 
     # --- rules dialog (singleton) ---
     def open_rules(self):
@@ -1661,9 +2503,26 @@ class App(tk.Tk):
             pass
 
     # --- replace with progress + lock ---
+    # 入力の文字数 × ルール数がこれ未満なら、進捗表示・編集ロック・ワーカーを使わずにその場で置換する
+    # （小さい入力では置換そのものより進捗ウィンドウを出す方が重い）。
+    # 連鎖置換は色付けに差分を取り、変更が多いと数千字でも秒単位になるので常にワーカーで行う
+    CHEAP_REPLACE = 200_000
+
     def replace(self):
         if self._replacing:
             return
+
+        src_text = self.input_text()
+        enabled_rules = self.enabled_rules()
+        cascade = bool(self.cascade_var.get())
+        if enabled_rules and not cascade and len(src_text) * len(enabled_rules) < self.CHEAP_REPLACE:
+            try:
+                out, spans = self._compute_replace(src_text, enabled_rules, False)
+                self._apply_replace_result(out, spans)
+            except Exception as e:
+                messagebox.showerror("エラー", f"置換中にエラーが発生しました:\n{e}", parent=self)
+            return
+
         self._replacing = True
 
         try:
@@ -1677,54 +2536,109 @@ class App(tk.Tk):
 
     def _do_replace_impl(self):
         try:
-            src_text = self.input.get("1.0", "end-1c")
+            src_text = self.input_text()
 
-            dict_names = self.selected_apply_dicts()
-            enabled_rules: List[Rule] = []
-            for dn in dict_names:
-                enabled_rules.extend([r for r in self.store.get_rules(dn) if r.enabled and r.src != ""])
+            enabled_rules = self.enabled_rules()
 
             if not enabled_rules:
                 messagebox.showwarning("ルールなし", "適用するルールがありません。\n辞書（ルール）で追加・ONにしてください。", parent=self)
+                self._finish_replace()
                 return
 
-            out = src_text
-            for r in enabled_rules:
-                out = out.replace(r.src, r.dst)
+            cascade = bool(self.cascade_var.get())
+            fut = self._pool.submit(self._compute_replace, src_text, enabled_rules, cascade)
+        except Exception as e:
+            messagebox.showerror("エラー", f"置換中にエラーが発生しました:\n{e}", parent=self)
+            self._finish_replace()
+            return
 
-            self.output.config(state="normal")
-            self.output.delete("1.0", "end")
-            self.output.insert("1.0", out)
-            self.output.config(state="disabled")
+        self.after(50, lambda: self._poll_replace(fut))
 
-            self.apply_diff_highlight(src_text, out)
-            self.set_message("置換しました")
+    def _compute_replace(self, src_text: str, rules: List[Rule], cascade: bool):
+        # 通常はワーカースレッドで実行（Tk には触らない）。軽い置換では replace から直接呼ぶ
+        if cascade:
+            out = cascade_replace(src_text, rules)
+            return out, cascade_spans(src_text, out, rules)
+        return self._get_matcher(rules).replace(src_text)
 
-            self.input_ln.redraw()
-            self.output_ln.redraw()
-            self.schedule_input_highlight()
+    def _poll_replace(self, fut):
+        if not fut.done():
+            self.after(50, lambda: self._poll_replace(fut))
+            return
+
+        try:
+            out, spans = fut.result()
+            self._apply_replace_result(out, spans)
 
         except Exception as e:
             messagebox.showerror("エラー", f"置換中にエラーが発生しました:\n{e}", parent=self)
 
         finally:
-            self._hide_progress()
-            self._replacing = False
-            try:
-                self.replace_btn.config(state="normal")
-            except Exception:
-                pass
-            self._set_edit_lock(False)
+            self._finish_replace()
+
+    def _apply_replace_result(self, out: str, spans: List[Tuple[int, int, str]]):
+        self._write_output(out, spans)
+        self.set_message("置換しました")
+
+        self.input_ln.redraw()
+        self.output_ln.redraw()
+        self.schedule_input_highlight()
+
+    def _finish_replace(self):
+        self._hide_progress()
+        self._replacing = False
+        try:
+            self.replace_btn.config(state="normal")
+        except Exception:
+            pass
+        self._set_edit_lock(False)
+
+    def _write_output(self, text: str, spans: List[Tuple[int, int, str]]):
+        """
+        出力の差し替えと色付けを1つのまとまりで行う。
+        先に保留中の描画を済ませておき、削除・挿入・タグ付けの途中では再描画させない。
+        """
+        try:
+            self.update_idletasks()
+        except Exception:
+            pass
+
+        out_w = self.output
+        # 編集ロック中なら disabled、軽い置換ではロックしないので normal のまま戻す
+        prev_state = out_w.cget("state")
+        out_w.config(state="normal")
+        try:
+            # delete + insert を Text の replace 1回で行う
+            out_w.replace("1.0", "end", text)
+            # 先に modified を戻す（立ったままだと手の編集とみなされ、置換箇所の情報が捨てられる）
+            out_w.edit_modified(False)
+            self.apply_diff_highlight(spans, text)
+            self._output_text = text
+        finally:
+            out_w.config(state=prev_state)
+
+    def _get_matcher(self, rules: List[Rule]) -> RuleMatcher:
+        # enabled_rules() のキャッシュと同じリストなら、中身を比べるまでもなく同じルール
+        compiled = self._compiled
+        if compiled is not None and rules is compiled[0]:
+            return compiled[2]
+        key = (tuple(r.src for r in rules), tuple(r.dst for r in rules))
+        if compiled is not None and key == compiled[1]:
+            matcher = compiled[2]
+        else:
+            matcher = RuleMatcher(rules)
+        self._compiled = (rules, key, matcher)
+        return matcher
 
     # --- output actions ---
     def copy(self):
-        text = self.output.get("1.0", "end-1c")
+        text = self.output_text()
         self.clipboard_clear()
         self.clipboard_append(text)
         self.set_message("コピーしました")
 
     def save_output(self):
-        text = self.output.get("1.0", "end-1c")
+        text = self.output_text()
 
         initialdir = None
         initialfile = None
@@ -1760,48 +2674,97 @@ class App(tk.Tk):
 
     # --- output highlight / hover ---
     def clear_highlight(self):
-        for tag in list(self.tag_map.keys()):
-            try:
-                self.output.tag_delete(tag)
-            except Exception:
-                pass
-        self.tag_map.clear()
-        self._last_hover_tag = None
+        w = self.output
+        try:
+            w.tag_remove("chg", "1.0", "end")
+            if self._span_before:
+                w.tk.call(w._w, "mark", "unset", *[f"chg_{k}" for k in range(len(self._span_before))])
+        except Exception:
+            pass
+        self._span_before = []
+        self._last_hover_span = None
+        self._last_hover_index = None
         self.tooltip.hide()
 
-    def apply_diff_highlight(self, original: str, modified: str):
+    def apply_diff_highlight(self, spans: List[Tuple[int, int, str]], text: str):
         self.clear_highlight()
+        if not spans:
+            return
 
-        sm = difflib.SequenceMatcher(a=original, b=modified)
-        k = 0
-        for op, i1, i2, j1, j2 in sm.get_opcodes():
-            if op == "equal":
-                continue
-            if op in ("replace", "insert") and j1 != j2:
-                k += 1
-                tag = f"chg_{k}"
-                self.output.tag_configure(tag, background="#fff3b0")
-                self.output.tag_add(tag, f"1.0+{j1}c", f"1.0+{j2}c")
-
-                before = original[i1:i2]
-                disp = before if len(before) <= 160 else before[:160] + "…"
-                self.tag_map[tag] = disp
+        # インデックスは "1.0+Nc" ではなく行頭表から求めた "行.列" を直接渡す
+        offsets: List[int] = [0] * (2 * len(spans))
+        before: List[str] = []
+        # 表示用文字列は切り詰めてから同じものを1つにまとめる（同じ置換が何度も出る文書で重複を持たない）
+        pool: Dict[str, str] = {}
+        for k, (j1, j2, b) in enumerate(spans):
+            offsets[2 * k] = j1
+            offsets[2 * k + 1] = j2
+            disp = b if len(b) <= 160 else b[:160] + "…"
+            before.append(pool.setdefault(disp, disp))
+        ranges = offsets_to_indices(line_starts_of(text), offsets)
+
+        w = self.output
+        # 全置換箇所を1回の tag add で付ける
+        w.tag_add("chg", *ranges)
+        # 置換箇所 k の先頭にマーク chg_k を置く。数が多いので Tcl 側で1回のスクリプトとして流す
+        path = w._w
+        w.tk.eval("\n".join(f"{path} mark set chg_{k} {ranges[2 * k]}" for k in range(len(before))))
+        self._span_before = before
+
+    def _span_at(self, idx: str) -> Optional[str]:
+        """idx の文字が置換箇所なら、その置換箇所のマーク名を返す"""
+        w = self.output
+        if not self._span_before or "chg" not in w.tag_names(idx):
+            return None
+        # idx を含む chg の範囲の先頭から idx までにある直近の chg_k が、その文字の置換箇所
+        rng = w.tag_prevrange("chg", f"{idx}+1c")
+        if not rng:
+            return None
+        mark = w.mark_previous(w.index(f"{idx}+1c"))
+        while mark is not None and not mark.startswith("chg_"):
+            mark = w.mark_previous(mark)
+        if mark is None or w.compare(mark, "<", rng[0]):
+            return None
+        return mark
 
     def on_hover(self, event):
-        idx = self.output.index(f"@{event.x},{event.y}")
-        tags = self.output.tag_names(idx)
-        dyn = None
-        for t in tags:
-            if t.startswith("chg_"):
-                dyn = t
-                break
+        # <Motion> は1ピクセルごとに来るので、ほぼ動いていなければ無視し、
+        # 残りは最新の座標だけ覚えて約16msに1回だけ調べる（予約済みなら after を積み増さない）
+        last_x, last_y = self._last_xy
+        if abs(event.x - last_x) + abs(event.y - last_y) < 3:
+            return
+        self._last_xy = (event.x, event.y)
+        if self._hover_pending is None:
+            self._hover_pending = self.after(16, self._do_hover)
 
-        if dyn and dyn in self.tag_map:
-            if self._last_hover_tag != dyn:
-                self._last_hover_tag = dyn
-                self.tooltip.show(self.winfo_pointerx(), self.winfo_pointery(), f"置換前: {self.tag_map[dyn]}")
+    def _on_output_leave(self, _event=None):
+        if self._hover_pending is not None:
+            try:
+                self.after_cancel(self._hover_pending)
+            except Exception:
+                pass
+            self._hover_pending = None
+        self._last_xy = (-9, -9)
+        self._last_hover_span = None
+        self._last_hover_index = None
+        self.tooltip.hide()
+
+    def _do_hover(self):
+        self._hover_pending = None
+        x, y = self._last_xy
+        idx = self.output.index(f"@{x},{y}")
+        if idx == self._last_hover_index:
+            return
+        self._last_hover_index = idx
+        mark = self._span_at(idx)
+
+        if mark is not None:
+            if self._last_hover_span != mark:
+                self._last_hover_span = mark
+                before = self._span_before[int(mark[4:])]
+                self.tooltip.show(self.winfo_pointerx(), self.winfo_pointery(), f"置換前: {before}")
         else:
-            self._last_hover_tag = None
+            self._last_hover_span = None
             self.tooltip.hide()
 
 